@@ -0,0 +1,116 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
+
+import aiohttp
+import allure
+
+from clients.spends_client import SpendsHttpClient
+from models.category import CategoryJson, category_list
+from models.config import Envs
+from models.spend import SpendAdd, SpendJson, spend_list
+from utils.cassette import CassetteMode, cassette
+
+# Длина query string ограничена - id на удаление уходят пачками
+REMOVE_CHUNK_SIZE = 50
+
+
+class AsyncSpendsHttpClient:
+    """Асинхронный клиент трат на aiohttp. Одновременно в полёте не больше concurrency запросов."""
+
+    session: aiohttp.ClientSession
+
+    def __init__(self, envs: Envs, token: str, concurrency: int = 10):
+        self.base_url = envs.gateway_url
+        self.headers = {
+            'Accept': 'application/json',
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'application/json'
+        }
+        self.concurrency = concurrency
+
+    async def __aenter__(self):
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.session = aiohttp.ClientSession(
+            headers=self.headers,
+            raise_for_status=True,
+            connector=aiohttp.TCPConnector(limit=self.concurrency)
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+
+    async def _request(self, method: str, url: str, **kwargs) -> bytes:
+        """Сырое тело ответа - модели разбирают его сами через validate_json, без промежуточных dict."""
+        async with self.semaphore:
+            async with self.session.request(method, self.base_url + url, **kwargs) as response:
+                return await response.read()
+
+    async def get_categories(self) -> list[CategoryJson]:
+        response = await self._request("GET", "/api/categories/all")
+        return category_list.validate_json(response)
+
+    async def add_category(self, name: str) -> CategoryJson:
+        response = await self._request("POST", "/api/categories/add", json={"category": name})
+        return CategoryJson.model_validate_json(response)
+
+    async def get_spends(self) -> list[SpendJson]:
+        response = await self._request("GET", "/api/spends/all")
+        return spend_list.validate_json(response)
+
+    async def add_spends(self, spend: SpendAdd) -> SpendJson:
+        response = await self._request("POST", "/api/spends/add", json=spend.model_dump())
+        return SpendJson.model_validate_json(response)
+
+    async def remove_spends(self, ids: list[str]):
+        await self._request("DELETE", "/api/spends/remove", params=[("ids", spend_id) for spend_id in ids])
+
+    async def add_spends_many(self, spends: Iterable[SpendAdd]) -> list[SpendJson]:
+        """Создаёт все траты параллельно, результат в порядке входного списка."""
+        return list(await asyncio.gather(*(self.add_spends(spend) for spend in spends)))
+
+    async def remove_spends_many(self, ids: list[str], chunk_size: int = REMOVE_CHUNK_SIZE):
+        """Удаляет траты пачками по chunk_size id, пачки уходят параллельно."""
+        chunks = [ids[i:i + chunk_size] for i in range(0, len(ids), chunk_size)]
+        await asyncio.gather(*(self.remove_spends(chunk) for chunk in chunks))
+
+
+class SpendsBulkClient:
+    """Синхронный фасад над AsyncSpendsHttpClient для фикстур: N созданий/удалений за одно окно запросов.
+    Корутины крутятся в отдельном потоке со своим event loop - в потоке теста может уже работать
+    loop Playwright sync API, и asyncio.run() там упадёт.
+    При записи и проигрывании кассеты запросы идут последовательно через SpendsHttpClient:
+    aiohttp сессия мимо кассеты не записывается, а в replay полезла бы в сеть."""
+
+    def __init__(self, envs: Envs, token: str, concurrency: int = 10):
+        self.envs = envs
+        self.token = token
+        self.concurrency = concurrency
+
+    def _run(self, action):
+        async def run():
+            async with AsyncSpendsHttpClient(self.envs, self.token, self.concurrency) as client:
+                return await action(client)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, run()).result()
+
+    def _cassette_client(self) -> SpendsHttpClient | None:
+        if cassette.mode == CassetteMode.OFF:
+            return None
+        return SpendsHttpClient(self.envs, self.token)
+
+    def add_spends(self, spends: list[SpendAdd]) -> list[SpendJson]:
+        with allure.step(f"POST /api/spends/add x{len(spends)}"):
+            if client := self._cassette_client():
+                return [client.add_spends(spend) for spend in spends]
+            return self._run(lambda client: client.add_spends_many(spends))
+
+    def remove_spends(self, ids: list[str]):
+        with allure.step(f"DELETE /api/spends/remove ({len(ids)} ids)"):
+            if client := self._cassette_client():
+                for i in range(0, len(ids), REMOVE_CHUNK_SIZE):
+                    client.remove_spends(ids[i:i + REMOVE_CHUNK_SIZE])
+                return
+            self._run(lambda client: client.remove_spends_many(ids))
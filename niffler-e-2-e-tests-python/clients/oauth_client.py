@@ -1,10 +1,14 @@
 import base64
+from urllib.parse import urlparse
 
 import pkce
+import requests
 
 from models.config import Envs
-from models.oauth import OAuthRequest
+from models.oauth import AuthState, CachedToken, OAuthRequest
 from utils.sessions import AuthSession
+from utils.token_cache import TokenCache
+from utils.tokens import is_token_expiring
 
 
 class OAuthClient:
@@ -16,7 +20,11 @@ class OAuthClient:
     def __init__(self, env: Envs):
         """Генерируем code_verifier и code_challenge. И генерируем basic auth token из секрета сервиса авторизации."""
         self.session = AuthSession(base_url=env.auth_url)
+        self.auth_url = env.auth_url
+        self.token_cache = TokenCache(env.token_cache_path) if env.token_cache_path else None
         self.redirect_uri = env.frontend_url + "/authorized"
+        frontend = urlparse(env.frontend_url)
+        self.frontend_origin = f"{frontend.scheme}://{frontend.netloc}"
         # Этот код мы написали самостоялтельно и заменили на целевую схему с использованием бибилотеки
         # self.code_verifier = base64.urlsafe_b64encode(os.urandom(32)).decode('utf-8')
         # self.code_verifier = re.sub('[^a-zA-Z0-9]+', '', self.code_verifier)
@@ -31,7 +39,36 @@ class OAuthClient:
         self.token = None
 
     def get_token(self, username, password):
-        """Возвращает token oauth для авторизации пользователя с username и password
+        """Возвращает token oauth для авторизации пользователя с username и password.
+        Сначала смотрим в файловый кэш: живой токен отдаём сразу, истекающий обновляем по refresh_token.
+        Полный логин - только если в кэше ничего нет или refresh не удался."""
+        if self.token_cache is None:
+            self.token = self._authorize(username, password).get("access_token", None)
+            return self.token
+
+        with self.token_cache.lock:
+            cached = self.token_cache.get(self.auth_url, username)
+            if cached and not is_token_expiring(cached.access_token):
+                self.token = cached.access_token
+                return self.token
+
+            tokens = self._refresh(cached.refresh_token) if cached and cached.refresh_token else None
+            if tokens is None:
+                tokens = self._authorize(username, password)
+            self.token = tokens.get("access_token", None)
+            self._cache_tokens(username, tokens)
+        return self.token
+
+    def _cache_tokens(self, username, tokens: dict):
+        """Кладёт токены в файловый кэш, вызывать под token_cache.lock."""
+        if tokens.get("access_token"):
+            self.token_cache.put(self.auth_url, username, CachedToken(
+                access_token=tokens["access_token"],
+                refresh_token=tokens.get("refresh_token")
+            ))
+
+    def _authorize(self, username, password) -> dict:
+        """Полный authorization code flow с PKCE, возвращает ответ /oauth2/token.
         1. Получаем jsessionid и xsrf-token куку в сесссию.
         2. Получаем code из redirect по xsrf-token'у.
         3. Получаем access_token.
@@ -67,6 +104,50 @@ class OAuthClient:
             },
             headers=self.authorization_basic,
         )
+        return token_response.json()
+
+    def _refresh(self, refresh_token) -> dict | None:
+        """Обновляет токены по refresh_token. None - если refresh отклонён (истёк, сервис авторизации перезапущен)."""
+        try:
+            token_response = self.session.post(
+                url="/oauth2/token",
+                data={
+                    "grant_type": "refresh_token",
+                    "refresh_token": refresh_token,
+                    "client_id": "client"
+                },
+                headers=self.authorization_basic,
+            )
+        except requests.HTTPError:
+            return None
+        tokens = token_response.json() if token_response.ok else {}
+        return tokens if tokens.get("access_token") else None
 
-        self.token = token_response.json().get("access_token", None)
-        return self.token
\ No newline at end of file
+    def get_auth_state(self, username, password) -> AuthState:
+        """Логинится и возвращает снимок авторизованного состояния для нового BrowserContext:
+        cookies сессии авторизации и id_token для sessionStorage фронтенда.
+        Всегда полный логин, мимо кэша токенов: токен из кэша или refresh не дают кук сессии
+        сервиса авторизации (JSESSIONID, XSRF-TOKEN). Свежие токены при этом попадают в кэш."""
+        tokens = self._authorize(username, password)
+        token = self.token = tokens.get("access_token", None)
+        if self.token_cache is not None:
+            with self.token_cache.lock:
+                self._cache_tokens(username, tokens)
+        cookies = [
+            {
+                "name": cookie.name,
+                "value": cookie.value,
+                "domain": cookie.domain,
+                "path": cookie.path or "/",
+                "expires": cookie.expires or -1,
+                "httpOnly": cookie.has_nonstandard_attr("HttpOnly"),
+                "secure": cookie.secure,
+            }
+            for cookie in self.session.cookies
+        ]
+        return AuthState(
+            token=token,
+            origin=self.frontend_origin,
+            storage_state={"cookies": cookies, "origins": []},
+            session_storage={"id_token": token},
+        )
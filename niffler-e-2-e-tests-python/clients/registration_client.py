@@ -0,0 +1,35 @@
+import requests
+
+from models.config import Envs
+from utils.sessions import AuthSession
+
+
+class RegistrationClient:
+    """Регистрирует пользователей через форму /register сервиса авторизации."""
+
+    session: AuthSession
+
+    def __init__(self, env: Envs):
+        self.session = AuthSession(base_url=env.auth_url)
+
+    def register(self, username: str, password: str) -> bool:
+        """Регистрирует пользователя. True - пользователь создан, False - такой username уже есть.
+        1. Получаем xsrf-token куку со страницы регистрации.
+        2. Отправляем форму регистрации с _csrf.
+        """
+        self.session.get("/register")
+        try:
+            self.session.post(
+                url="/register",
+                data={
+                    "username": username,
+                    "password": password,
+                    "passwordSubmit": password,
+                    "_csrf": self.session.cookies.get("XSRF-TOKEN")
+                }
+            )
+        except requests.HTTPError as e:
+            if "already exists" in e.response.text:
+                return False
+            raise
+        return True
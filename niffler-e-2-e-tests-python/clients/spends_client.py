@@ -1,10 +1,15 @@
+from typing import Iterator
+
 import requests
 
 from models.config import Envs
-from models.spend import Spend, SpendAdd
-from models.category import Category
+from models.spend import SpendAdd, SpendJson, SpendsPage, spend_list
+from models.category import CategoryJson, category_list
 from utils.sessions import BaseSession
 
+SPENDS_PAGE_SIZE = 50
+SPENDS_PAGE_SORT = ["spendDate,desc", "id,asc"]
+
 
 class SpendsHttpClient:
     session: requests.Session
@@ -19,26 +24,48 @@ class SpendsHttpClient:
         })
 
 
-    def get_categories(self) -> list[Category]:
+    def get_categories(self) -> list[CategoryJson]:
         response = self.session.get( "/api/categories/all")
-        return [Category.model_validate(item) for item in response.json()]
+        return category_list.validate_json(response.content)
 
 
-    def add_category(self, name: str) -> Category:
+    def add_category(self, name: str) -> CategoryJson:
         response = self.session.post("/api/categories/add", json={
             "category": name
         })
-        return Category.model_validate(response.json())
+        return CategoryJson.model_validate_json(response.content)
+
 
+    def get_spends(self, filter_period: str | None = None, filter_currency: str | None = None) -> list[SpendJson]:
+        response = self.session.get("/api/spends/all", params=spend_filters(filter_period, filter_currency))
+        return spend_list.validate_json(response.content)
 
-    def get_spends(self) -> list[Spend]:
-        response = self.session.get("/api/spends/all")
-        return [Spend.model_validate(item) for item in response.json()]
 
+    def iter_spends(
+            self,
+            filter_period: str | None = None,
+            filter_currency: str | None = None,
+            page_size: int = SPENDS_PAGE_SIZE
+    ) -> Iterator[SpendJson]:
+        """Траты постранично через /api/v2/spends/all, сверху - новые. Следующая страница запрашивается,
+        только когда дочитана предыдущая: any(spend.id == ... for spend in iter_spends()) останавливается
+        на первой странице с совпадением, в памяти держится одна страница."""
+        # Без явного sort у gateway и niffler-spend нет ORDER BY - страницы LIMIT/OFFSET могли бы
+        # пересекаться или терять строки; id - tiebreaker для трат с одной датой
+        params = spend_filters(filter_period, filter_currency) | {"size": page_size, "sort": SPENDS_PAGE_SORT}
+        page = 0
+        while True:
+            response = self.session.get("/api/v2/spends/all", params=params | {"page": page})
+            spends_page = SpendsPage.model_validate_json(response.content)
+            yield from spends_page.content
+            if spends_page.last or not spends_page.content:
+                return
+            page += 1
 
-    def add_spends(self, spend: SpendAdd) -> Spend:
+
+    def add_spends(self, spend: SpendAdd) -> SpendJson:
         response = self.session.post("/api/spends/add", json=spend.model_dump())
-        return Spend.model_validate(response.json())
+        return SpendJson.model_validate_json(response.content)
 
 
     def remove_spends(self, ids: list[str]):
@@ -46,3 +73,12 @@ class SpendsHttpClient:
         НО, если надо проверить саму ручку удаления - то надо добавить возврат response."""
         self.session.delete("/api/spends/remove", params={"ids": ids})
 
+
+def spend_filters(filter_period: str | None, filter_currency: str | None) -> dict:
+    """Фильтры gateway: filterPeriod - TODAY, WEEK или MONTH, filterCurrency - RUB, USD, EUR, KZT."""
+    params = {}
+    if filter_period:
+        params["filterPeriod"] = filter_period
+    if filter_currency:
+        params["filterCurrency"] = filter_currency
+    return params
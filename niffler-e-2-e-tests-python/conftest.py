@@ -1,13 +1,29 @@
 import os
+import time
 
 import allure
 import pytest
 from allure_commons.reporter import AllureReporter
 from allure_commons.types import AttachmentType
 from allure_pytest.listener import AllureListener
-from pytest import Item, FixtureDef, FixtureRequest
 from dotenv import load_dotenv
-from models.config import Envs
+from pytest import Item, FixtureDef, FixtureRequest, Parser, Config, TestReport
+from fakes.niffler import start_fake_backend
+from models.config import Envs, load_envs
+from databases.pool import pool_stats_key
+from utils.allure_helpers import (
+    AttachLevel, attach_failed_test_responses, attach_settings, attachment_writer, configure_attachments,
+    failed_test_responses, sql_capture
+)
+from utils.cassette import CassetteMode, cassette
+from utils.cleanup import cleanup_registry_key
+from utils.fixture_profiler import fixture_profiler
+from utils.latency import endpoint_latency
+from utils.scheduling import (
+    load_durations, longest_first, lpt_shard, recorded_durations, shard_option, store_durations
+)
+from utils.sessions import configure_transport
+from utils.workers import provision_worker_user, worker_id
 
 
 pytest_plugins = ["fixtures.auth_fixtures", "fixtures.client_fixtures", "fixtures.pages_fixtures"]
@@ -18,36 +34,153 @@ def allure_logger(config) -> AllureReporter:
     return listener.allure_logger
 
 
+def pytest_addoption(parser: Parser):
+    parser.addoption("--shard", type=shard_option, default=None, metavar="i/n",
+                     help="Run only shard i of n, tests are split by .test_durations with LPT")
+    parser.addoption("--store-durations", action="store_true", default=False,
+                     help="Save test durations of this run into .test_durations")
+
+
+def pytest_configure(config: Config):
+    # Кассета пишется одним файлом: воркеры xdist затирали бы записи друг друга
+    if getattr(config.option, "dist", "no") != "no":
+        load_dotenv()
+        if os.getenv("CASSETTE_MODE", "off") == CassetteMode.RECORD:
+            raise pytest.UsageError("CASSETTE_MODE=record writes one cassette file, run it without -n")
+
+
+def pytest_collection_modifyitems(config: Config, items: list[Item]):
+    durations = load_durations()
+    shard = config.getoption("shard")
+    if shard:
+        selected = lpt_shard(items, durations, *shard)
+        selected_ids = {item.nodeid for item in selected}
+        config.hook.pytest_deselected(items=[item for item in items if item.nodeid not in selected_ids])
+        items[:] = selected
+    # Порядок меняем только в воркерах xdist: там он решает, как тесты разойдутся по воркерам,
+    # а последовательный прогон идёт в привычном порядке файлов
+    if durations and hasattr(config, "workerinput"):
+        items[:] = longest_first(items, durations)
+
+
+def pytest_runtest_logreport(report: TestReport):
+    recorded_durations[report.nodeid] = recorded_durations.get(report.nodeid, 0.0) + report.duration
+
+
 @pytest.hookimpl(hookwrapper=True, trylast=True)
 def pytest_runtest_call(item: Item):
     yield
     allure.dynamic.title(" ".join(item.name.split("_")[1:]).title())
 
 
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item: Item, call):
+    report = (yield).get_result()
+    fixture_profiler.record_phase(report.when, report.duration)
+    if report.failed:
+        attach_failed_test_responses()
+        if attach_settings.sql_level != AttachLevel.OFF:
+            sql_capture.attach()
+    if report.when == "teardown":
+        failed_test_responses.clear()
+        if attach_settings.sql_level == AttachLevel.ALWAYS:
+            sql_capture.attach()
+        sql_capture.records.clear()
+
+
+def pytest_sessionfinish(session):
+    attachment_writer.flush()
+    cassette.close()
+    if hasattr(session.config, "workeroutput"):
+        # Воркер xdist: гистограммы и итоги пулов уезжают контроллеру, он их сольёт и запишет отчёт
+        session.config.workeroutput["endpoint_latency"] = endpoint_latency.to_dict()
+        session.config.workeroutput["fixture_profile"] = fixture_profiler.to_dict()
+        session.config.workeroutput["pool_stats"] = session.config.stash.get(pool_stats_key, [])
+        return
+    if session.config.getoption("store_durations") and recorded_durations:
+        store_durations(recorded_durations)
+    if endpoint_latency.histograms:
+        endpoint_latency.write_report()
+    if fixture_profiler.fixtures:
+        fixture_profiler.write_report()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    workeroutput = getattr(node, "workeroutput", {})
+    endpoint_latency.merge(workeroutput.get("endpoint_latency", {}))
+    fixture_profiler.merge(workeroutput.get("fixture_profile", {}))
+    node.config.stash.setdefault(pool_stats_key, []).extend(
+        f"[{node.gateway.id}] {line}" for line in workeroutput.get("pool_stats", [])
+    )
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    pool_stats = config.stash.get(pool_stats_key, [])
+    if pool_stats:
+        terminalreporter.write_sep("-", "DB connection pools")
+        for line in pool_stats:
+            terminalreporter.write_line(line)
+    if endpoint_latency.histograms:
+        terminalreporter.write_sep("-", "HTTP endpoints by total time")
+        for line in endpoint_latency.summary():
+            terminalreporter.write_line(line)
+    if fixture_profiler.fixtures:
+        terminalreporter.write_sep("-", "Costliest fixtures")
+        for line in fixture_profiler.summary():
+            terminalreporter.write_line(line)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_teardown(item: Item):
+    yield
+    registry = item.config.stash.get(cleanup_registry_key, None)
+    if registry:
+        registry.test_finished()
+
+
 @pytest.hookimpl(hookwrapper=True, trylast=True)
 def pytest_fixture_setup(fixturedef: FixtureDef, request: FixtureRequest):
+    start = time.perf_counter()
     yield
+    fixture_profiler.record_setup(fixturedef, time.perf_counter() - start)
+    # Финализаторы выполняются в обратном порядке: этот - перед teardown самой фикстуры,
+    # конец teardown отмечает pytest_fixture_post_finalizer
+    fixturedef.addfinalizer(lambda: fixture_profiler.start_teardown(fixturedef))
     logger = allure_logger(request.config)
     item = logger.get_last_item()
     scope_letter = fixturedef.scope[0].upper()
     item.name = f"[{scope_letter}] " + " ".join(fixturedef.argname.split("_")).title()
 
 
+def pytest_fixture_post_finalizer(fixturedef: FixtureDef, request: FixtureRequest):
+    fixture_profiler.finish_teardown(fixturedef)
+
+
 @pytest.fixture(scope="session")
 def envs() -> Envs:
-    load_dotenv()
-    envs_instance = Envs(
-        frontend_url=os.getenv("FRONTEND_URL"),
-        gateway_url=os.getenv("GATEWAY_URL"),
-        auth_url=os.getenv("AUTH_URL"),
-        auth_secret=os.getenv("AUTH_SECRET"),
-        spend_db_url=os.getenv("SPEND_DB_URL"),
-        test_username=os.getenv("TEST_USERNAME"),
-        test_password=os.getenv("TEST_PASSWORD"),
-        invalid_user=os.getenv("INVALID_USER"),
-        invalid_password=os.getenv("INVALID_PASSWORD"),
-        wrong_password=os.getenv("WRONG_PASSWORD")
+    envs_instance = load_envs()
+    configure_attachments(
+        envs_instance.allure_attach,
+        envs_instance.allure_attach_max_bytes,
+        envs_instance.allure_sql,
+        envs_instance.allure_sql_buffer
+    )
+    configure_transport(
+        envs_instance.http_pool_size,
+        envs_instance.http_keep_alive,
+        envs_instance.http_retries,
+        envs_instance.http_backoff_factor,
+        envs_instance.http_backoff_jitter,
+        envs_instance.http_connect_timeout,
+        envs_instance.http_read_timeout
     )
+    cassette.configure(envs_instance.cassette_mode, envs_instance.cassette_path)
+    if envs_instance.fake_backend:
+        envs_instance = start_fake_backend(envs_instance)
+    # В replay сервис авторизации недоступен, пользователь воркера ни на что не влияет
+    if envs_instance.worker_users and worker_id() != "master" and cassette.mode != CassetteMode.REPLAY:
+        envs_instance = provision_worker_user(envs_instance, worker_id())
     allure.attach(envs_instance.model_dump_json(indent=2), name="envs.json", attachment_type=AttachmentType.JSON)
     return envs_instance
 
@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, event, Engine
+from sqlalchemy.pool import NullPool, QueuePool
+
+from models.config import Envs
+
+
+class PoolStats:
+    """Статистика пула соединений: сколько соединений открыто и за сколько, сколько checkout'ов
+    и сколько они ждали свободное соединение в очереди (без времени открытия нового)."""
+
+    def __init__(self):
+        self.connects = 0
+        self.checkouts = 0
+        self.invalidated = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.connect_total = 0.0
+
+    def install(self, engine: Engine):
+        event.listen(engine, "connect", self.on_connect)
+        event.listen(engine, "checkout", self.on_checkout)
+        event.listen(engine, "invalidate", self.on_invalidate)
+
+    def on_connect(self, dbapi_connection, connection_record):
+        self.connects += 1
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+
+    def on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.invalidated += 1
+
+    def record_connect(self, seconds: float):
+        self.connect_total += seconds
+
+    def record_wait(self, seconds: float):
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+
+    def summary(self, engine: Engine) -> str:
+        avg_ms = self.wait_total / self.checkouts * 1000 if self.checkouts else 0.0
+        connect_avg_ms = self.connect_total / self.connects * 1000 if self.connects else 0.0
+        return (
+            f"{engine.url.database}: {self.connects} connections opened (connect avg {connect_avg_ms:.2f} ms), "
+            f"{self.invalidated} invalidated, {self.checkouts} checkouts, queue wait avg {avg_ms:.2f} ms / max {self.wait_max * 1000:.2f} ms, "
+            f"pool: {engine.pool.status()}"
+        )
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool, который засекает, сколько checkout ждал свободное соединение. _do_get сам открывает
+    новое соединение, если пул не исчерпан - время открытия считается отдельно и из ожидания вычитается."""
+
+    stats: PoolStats | None = None
+    # Время открытия соединений внутри текущего _do_get, своё у каждого потока
+    _connect_time = threading.local()
+
+    def _create_connection(self):
+        start = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            elapsed = time.perf_counter() - start
+            self._connect_time.seconds = getattr(self._connect_time, "seconds", 0.0) + elapsed
+            if self.stats:
+                self.stats.record_connect(elapsed)
+
+    def _do_get(self):
+        self._connect_time.seconds = 0.0
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.stats:
+                self.stats.record_wait(time.perf_counter() - start - self._connect_time.seconds)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def create_db_engine(url: str, envs: Envs, stats: PoolStats) -> Engine:
+    """Движок с настройками пула из envs. pre_ping отбраковывает соединения, умершие после рестарта БД,
+    recycle не даёт держать соединения дольше таймаутов сервера/пулера.
+    В режиме pgbouncer свой пул не держим: соединения пулит внешний PgBouncer, общий для всех воркеров."""
+    if envs.db_pgbouncer:
+        engine = create_engine(url, poolclass=NullPool, pool_pre_ping=envs.db_pool_pre_ping)
+    else:
+        engine = create_engine(
+            url,
+            poolclass=TimedQueuePool,
+            pool_size=envs.db_pool_size,
+            max_overflow=envs.db_max_overflow,
+            pool_recycle=envs.db_pool_recycle,
+            pool_pre_ping=envs.db_pool_pre_ping,
+            pool_timeout=envs.db_pool_timeout
+        )
+        engine.pool.stats = stats
+    stats.install(engine)
+    return engine
+
+
+# Итоги пулов всех движков за сессию, печатаются в terminal summary
+pool_stats_key = pytest.StashKey[list[str]]()
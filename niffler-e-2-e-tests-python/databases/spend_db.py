@@ -1,40 +1,357 @@
-from typing import Sequence
+import copy
+import select as io_select
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterator, Sequence, TypedDict, TypeVar, Unpack
 
 import allure
 from allure import step
 from allure_commons.types import AttachmentType
-from sqlalchemy import create_engine, Engine, event
+from sqlalchemy import delete, insert, or_, text, Connection, Engine, Row
+from sqlalchemy import select as sa_select
 from sqlmodel import Session, select
 
-from models.spend import Spend
+from databases.pool import PoolStats, create_db_engine
+from models.spend import Spend, SpendAdd
 from models.config import Envs
 from models.category import Category
-from utils.allure_helpers import attach_sql
+from utils.allure_helpers import sql_capture
+
+
+T = TypeVar("T")
+
+TEST_INDEXES_SQL = Path(__file__).parent / "spend_test_indexes.sql"
+# Описания трат, которые создают тесты через UI и удаляют сами - если тест упал, трата остаётся навсегда
+ORPHAN_SPEND_PATTERNS = ("Test DB Spend %",)
+
+
+class SpendFilters(TypedDict, total=False):
+    """Фильтры трат, которые выполняются в SQL. Даты - aware datetime."""
+    description: str
+    ids: list[str]
+    date_from: datetime
+    date_to: datetime
+    category: str
+
+
+SPEND_NOTIFY_CHANNEL = "spend_changed"
+# Триггер только для тестового стенда: на любое изменение spend шлёт NOTIFY с username.
+# Ставится один раз и остаётся в БД между запусками (им пользуются все воркеры и следующие прогоны),
+# снять - SpendDb.drop_notify_trigger(). Установку воркеры делают по очереди под advisory lock,
+# CREATE OR REPLACE не оставляет окна без триггера, как DROP + CREATE.
+SPEND_NOTIFY_LOCK = f"SELECT pg_advisory_xact_lock(hashtext('{SPEND_NOTIFY_CHANNEL}'))"
+SPEND_NOTIFY_TRIGGER_EXISTS = """
+SELECT 1 FROM pg_trigger WHERE tgname = 'spend_changed' AND tgrelid = 'spend'::regclass
+"""
+SPEND_NOTIFY_TRIGGER = f"""
+CREATE OR REPLACE FUNCTION notify_spend_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('{SPEND_NOTIFY_CHANNEL}', COALESCE(NEW.username, OLD.username));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+CREATE OR REPLACE TRIGGER spend_changed AFTER INSERT OR UPDATE OR DELETE ON spend
+    FOR EACH ROW EXECUTE FUNCTION notify_spend_changed();
+"""
+SPEND_NOTIFY_TRIGGER_DROP = """
+DROP TRIGGER IF EXISTS spend_changed ON spend;
+DROP FUNCTION IF EXISTS notify_spend_changed();
+"""
+
+
+PURGE_MARKER_DIR = Path(".spend_db_purge")
+
+
+def orphan_purge_due(username: str, interval_hours: float, marker_dir: Path = PURGE_MARKER_DIR) -> bool:
+    """True раз в interval_hours на пользователя: время последней чистки - mtime файла-маркера."""
+    marker = marker_dir / username
+    return not (marker.exists() and time.time() - marker.stat().st_mtime < interval_hours * 3600)
+
+
+def mark_orphan_purged(username: str, marker_dir: Path = PURGE_MARKER_DIR):
+    """Отмечает успешную чистку - вызывать после purge_orphaned_spends, чтобы упавшая чистка повторилась."""
+    marker_dir.mkdir(exist_ok=True)
+    (marker_dir / username).touch()
 
 
 class SpendDb:
 
     engine: Engine
+    bind: Engine | Connection
 
     def __init__(self, envs: Envs):
-        self.engine = create_engine(envs.spend_db_url)
-        event.listen(self.engine, "do_execute", fn=attach_sql)
+        self.pool_stats = PoolStats()
+        self.engine = create_db_engine(envs.spend_db_url, envs, self.pool_stats)
+        self.bind = self.engine
+        sql_capture.install(self.engine)
+        self.seeded_category_ids: list[str] = []
+        self.seeded_spend_ids: list[str] = []
+        self.notify = envs.spend_db_notify
+        self._listener = None
+        if self.notify:
+            self.install_notify_trigger()
+        if envs.spend_db_indexes:
+            self.create_test_indexes()
+
+    def _session(self) -> Session:
+        """Сессия на движке или, в режиме rollback_isolated, на соединении теста:
+        commit внутри неё только отпускает SAVEPOINT, внешняя транзакция остаётся открытой."""
+        return Session(self.bind, join_transaction_mode="create_savepoint")
+
+    @contextmanager
+    def rollback_isolated(self) -> Iterator["SpendDb"]:
+        """Копия SpendDb на выделенном соединении в транзакции, которая откатывается на выходе:
+        всё, что тест записал через неё, исчезает без явных удалений, даже если тест упал."""
+        with self.engine.connect() as connection:
+            transaction = connection.begin()
+            isolated = copy.copy(self)
+            isolated.bind = connection
+            isolated.seeded_category_ids = []
+            isolated.seeded_spend_ids = []
+            try:
+                yield isolated
+            finally:
+                transaction.rollback()
+
+    @step('DB: Purge orphaned test spends')
+    def purge_orphaned_spends(self, username: str, patterns: Sequence[str] = ORPHAN_SPEND_PATTERNS) -> int:
+        """Удаляет траты, которые тесты создали, но не удалили (упали до cleanup), по шаблонам описания."""
+        with self._session() as session:
+            result = session.execute(
+                delete(Spend).where(Spend.username == username, or_(*(Spend.description.like(p) for p in patterns)))
+            )
+            session.commit()
+            return result.rowcount
 
     @step('DB: Get user categories')
     def get_user_categories(self, username: str) -> Sequence[Category]:
-        with Session(self.engine) as session:
+        with self._session() as session:
             statement = select(Category).where(Category.username == username)
             return session.exec(statement).all()
 
     @step('DB: Delete a category')
     def delete_category(self, category_id: str):
-        with Session(self.engine) as session:
+        with self._session() as session:
             category = session.get(Category, category_id)
             session.delete(category)
             session.commit()
 
+    @step('DB: Delete categories')
+    def delete_categories(self, category_ids: list[str]):
+        """Удаляет категории вместе с их тратами одним DELETE на таблицу."""
+        with self._session() as session:
+            session.execute(delete(Spend).where(Spend.category_id.in_(category_ids)))
+            session.execute(delete(Category).where(Category.id.in_(category_ids)))
+            session.commit()
+
     @step('DB: Retrieve user spends')
     def get_user_spends(self, username: str) -> Sequence[Spend]:
-        with Session(self.engine) as session:
+        with self._session() as session:
             statement = select(Spend).where(Spend.username == username)
-            return session.exec(statement).all()
\ No newline at end of file
+            return session.exec(statement).all()
+
+    @step('DB: Find user spends')
+    def find_spends(self, username: str, limit: int | None = None, **filters: Unpack[SpendFilters]) -> Sequence[Spend]:
+        """Траты пользователя с фильтрами на стороне БД вместо перебора всех трат в Python."""
+        with self._session() as session:
+            return session.exec(self._filtered(select(Spend), username, filters).limit(limit)).all()
+
+    @step('DB: Find user spend ids')
+    def find_spend_ids(self, username: str, limit: int | None = None, **filters: Unpack[SpendFilters]) -> list[str]:
+        """Только id подходящих трат, без сборки ORM объектов."""
+        with self._session() as session:
+            statement = self._filtered(select(Spend.id), username, filters).limit(limit)
+            return [str(spend_id) for spend_id in session.exec(statement)]
+
+    @step('DB: Find user spend rows')
+    def find_spend_rows(
+        self,
+        username: str,
+        columns: Sequence = (Spend.id, Spend.description, Spend.amount, Spend.spend_date),
+        limit: int | None = None,
+        **filters: Unpack[SpendFilters]
+    ) -> Sequence[Row]:
+        """Проекция: только нужные колонки подходящих трат, без сборки ORM объектов."""
+        with self._session() as session:
+            return session.execute(self._filtered(sa_select(*columns), username, filters).limit(limit)).all()
+
+    @staticmethod
+    def _filtered(statement, username: str, filters: SpendFilters):
+        statement = statement.where(Spend.username == username)
+        if "description" in filters:
+            statement = statement.where(Spend.description == filters["description"])
+        if "ids" in filters:
+            statement = statement.where(Spend.id.in_(filters["ids"]))
+        if "date_from" in filters:
+            statement = statement.where(Spend.spend_date >= filters["date_from"])
+        if "date_to" in filters:
+            statement = statement.where(Spend.spend_date <= filters["date_to"])
+        if "category" in filters:
+            statement = statement.join(Category, Category.id == Spend.category_id).where(
+                Category.category == filters["category"]
+            )
+        return statement
+
+    @step('DB: Wait for spend')
+    def wait_for_spend(
+        self,
+        username: str,
+        predicate: Callable[[Spend], bool] | None = None,
+        timeout: float = 5.0,
+        **filters: Unpack[SpendFilters]
+    ) -> Spend | None:
+        """Ждёт появления у пользователя траты, подходящей под filters (в SQL) и predicate (в Python).
+        None - если не дождались за timeout."""
+        def find():
+            with self._session() as session:
+                spends = session.exec(self._filtered(select(Spend), username, filters))
+                return next((spend for spend in spends if predicate is None or predicate(spend)), None)
+
+        return self._wait(find, timeout)
+
+    @step('DB: Wait for spend to be deleted')
+    def wait_for_spend_absent(
+        self,
+        username: str,
+        predicate: Callable[[Spend], bool] | None = None,
+        timeout: float = 5.0,
+        **filters: Unpack[SpendFilters]
+    ) -> bool:
+        """Ждёт, пока у пользователя не останется трат, подходящих под filters и predicate. False - если не дождались."""
+        def absent():
+            with self._session() as session:
+                if predicate is None:
+                    return session.exec(self._filtered(select(Spend.id), username, filters).limit(1)).first() is None
+                spends = session.exec(self._filtered(select(Spend), username, filters))
+                return not any(predicate(spend) for spend in spends)
+
+        return bool(self._wait(absent, timeout))
+
+    @step('DB: Install NOTIFY trigger')
+    def install_notify_trigger(self):
+        """Ставит триггер NOTIFY, если его ещё нет. Уже установленный не трогаем - DDL на spend
+        берёт блокировку таблицы, пока остальные воркеры в неё пишут."""
+        with self.engine.begin() as connection:
+            connection.execute(text(SPEND_NOTIFY_LOCK))
+            if connection.execute(text(SPEND_NOTIFY_TRIGGER_EXISTS)).first() is None:
+                connection.execute(text(SPEND_NOTIFY_TRIGGER))
+
+    @step('DB: Drop NOTIFY trigger')
+    def drop_notify_trigger(self):
+        """Снимает триггер NOTIFY со стенда. Не вызывать, пока идут тесты с SPEND_DB_NOTIFY=true."""
+        with self.engine.begin() as connection:
+            connection.execute(text(SPEND_NOTIFY_LOCK))
+            connection.execute(text(SPEND_NOTIFY_TRIGGER_DROP))
+
+    @step('DB: Create test indexes')
+    def create_test_indexes(self):
+        """Индексы тестовой схемы под фильтры find_*: запросы остаются быстрыми при росте тестовых аккаунтов."""
+        with self.engine.begin() as connection:
+            connection.execute(text(TEST_INDEXES_SQL.read_text()))
+
+    def _wait(self, check: Callable[[], T], timeout: float) -> T | None:
+        """Проверяет check, пока он не вернёт непустой результат. Между проверками ждём NOTIFY от триггера
+        (если включён) или паузу, которая растёт от 50 мс до 1 с - быстрые изменения ловим сразу,
+        медленные не заваливают БД запросами."""
+        deadline = time.monotonic() + timeout
+        delay = 0.05
+        while True:
+            result = check()
+            remaining = deadline - time.monotonic()
+            if result or remaining <= 0:
+                return result or None
+            self._wait_for_change(min(delay, remaining))
+            delay = min(delay * 2, 1.0)
+
+    def _wait_for_change(self, seconds: float):
+        if not self.notify:
+            time.sleep(seconds)
+            return
+        listener = self._notify_listener()
+        if io_select.select([listener], [], [], seconds)[0]:
+            listener.poll()
+            listener.notifies.clear()
+
+    def _notify_listener(self):
+        """Отдельное autocommit соединение с LISTEN, выведенное из пула: живёт, пока жив SpendDb."""
+        if self._listener is None:
+            connection = self.engine.raw_connection()
+            connection.detach()
+            listener = connection.driver_connection
+            listener.rollback()
+            listener.autocommit = True
+            listener.cursor().execute(f"LISTEN {SPEND_NOTIFY_CHANNEL}")
+            self._listener = listener
+        return self._listener
+
+    @step('DB: Seed categories')
+    def seed_categories(self, username: str, names: list[str]) -> list[str]:
+        """Создаёт категории одним executemany в одной транзакции, возвращает их id.
+        id регистрируются для удаления в cleanup_seeded()."""
+        rows = [{"id": str(uuid.uuid4()), "category": name, "username": username} for name in names]
+        with self._session() as session:
+            session.execute(insert(Category), rows)
+            session.commit()
+        ids = [row["id"] for row in rows]
+        self.seeded_category_ids.extend(ids)
+        return ids
+
+    @step('DB: Seed spends')
+    def seed_spends(self, username: str, spends: list[SpendAdd]) -> list[str]:
+        """Создаёт траты в обход gateway одним executemany в одной транзакции, возвращает их id.
+        Категории ищутся по имени у пользователя, недостающие создаются в той же транзакции.
+        id регистрируются для удаления в cleanup_seeded()."""
+        names = {spend.category for spend in spends}
+        with self._session() as session:
+            statement = select(Category).where(Category.username == username, Category.category.in_(names))
+            category_ids = {category.category: category.id for category in session.exec(statement)}
+            new_categories = [
+                {"id": str(uuid.uuid4()), "category": name, "username": username}
+                for name in names - category_ids.keys()
+            ]
+            if new_categories:
+                session.execute(insert(Category), new_categories)
+                category_ids.update({row["category"]: row["id"] for row in new_categories})
+
+            rows = [
+                {
+                    "id": str(uuid.uuid4()),
+                    "username": username,
+                    "spend_date": self._spend_date(spend.spendDate),
+                    "currency": spend.currency,
+                    "amount": spend.amount,
+                    "description": spend.description,
+                    "category_id": category_ids[spend.category],
+                }
+                for spend in spends
+            ]
+            session.execute(insert(Spend), rows)
+            session.commit()
+        self.seeded_category_ids.extend(row["id"] for row in new_categories)
+        ids = [row["id"] for row in rows]
+        self.seeded_spend_ids.extend(ids)
+        return ids
+
+    @staticmethod
+    def _spend_date(value: str) -> date:
+        """spendDate приходит и как дата, и как ISO время с Z. Колонка spend_date - date: передаём день по UTC,
+        а не timestamptz, который PostgreSQL обрезал бы до даты в своей таймзоне и мог сдвинуть на сутки."""
+        spend_date = datetime.fromisoformat(value)
+        if spend_date.tzinfo:
+            spend_date = spend_date.astimezone(timezone.utc)
+        return spend_date.date()
+
+    @step('DB: Delete seeded data')
+    def cleanup_seeded(self):
+        """Удаляет всё, что создано через seed_*: сначала траты, потом категории (FK), по одному DELETE на таблицу."""
+        with self._session() as session:
+            if self.seeded_spend_ids:
+                session.execute(delete(Spend).where(Spend.id.in_(self.seeded_spend_ids)))
+            if self.seeded_category_ids:
+                session.execute(delete(Category).where(Category.id.in_(self.seeded_category_ids)))
+            session.commit()
+        self.seeded_spend_ids.clear()
+        self.seeded_category_ids.clear()
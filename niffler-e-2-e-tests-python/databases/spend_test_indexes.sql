@@ -0,0 +1,4 @@
+-- Индексы только для тестового стенда: под фильтры SpendDb.find_* и ожидания wait_for_spend*
+CREATE INDEX IF NOT EXISTS ix_spend_username_description ON spend (username, description);
+CREATE INDEX IF NOT EXISTS ix_spend_username_spend_date ON spend (username, spend_date);
+CREATE INDEX IF NOT EXISTS ix_spend_category_id ON spend (category_id);
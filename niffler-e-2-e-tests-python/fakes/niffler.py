@@ -0,0 +1,438 @@
+"""Подменный Niffler для API тестов без docker-compose: сервис авторизации (authorization code + PKCE,
+refresh_token, регистрация) и gateway (/api/categories/*, /api/spends/*) в одном aiohttp приложении,
+данные - в памяти процесса.
+
+В тестах поднимается в фоновом потоке энвом FAKE_BACKEND=true. Отдельным процессом:
+    python -m fakes.niffler --port 8099 --user duck:12345
+и GATEWAY_URL, AUTH_URL, FRONTEND_URL = http://127.0.0.1:8099.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import secrets
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+from urllib.parse import urlencode
+
+from aiohttp import web
+
+from models.config import Envs
+from utils.workers import WORKER_SEED_CATEGORY
+
+CURRENCIES = {"RUB", "USD", "EUR", "KZT"}
+MAX_CATEGORIES = 8
+TOKEN_TTL_SECONDS = 3600
+SESSION_COOKIE = "JSESSIONID"
+XSRF_COOKIE = "XSRF-TOKEN"
+# Владелец токена запроса к gateway, проставляет middleware gateway_auth
+USERNAME_KEY = web.RequestKey("username", str)
+
+
+def b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def redirect(location: str) -> web.Response:
+    """302 обычным ответом: возвращать из хендлера HTTPException в aiohttp устарело."""
+    return web.Response(status=HTTPStatus.FOUND, headers={"Location": location})
+
+
+def format_date(value: datetime) -> str:
+    """Формат java.util.Date в ответах gateway (Jackson): 2025-03-18T00:01:27.955+00:00."""
+    return value.astimezone(timezone.utc).isoformat(timespec="milliseconds")
+
+
+def parse_date(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def error(status: int, detail: str, request: web.Request) -> web.Response:
+    """Ошибка в формате ErrorJson/ProblemDetail gateway."""
+    return web.json_response({
+        "type": "about:blank",
+        "title": HTTPStatus(status).phrase,
+        "status": status,
+        "detail": detail,
+        "instance": request.path
+    }, status=status)
+
+
+class FakeNifflerStore:
+    """Пользователи, сессии авторизации, выданные токены, категории и траты."""
+
+    def __init__(self):
+        self.users: dict[str, dict] = {}
+        self.sessions: dict[str, dict] = {}
+        self.codes: dict[str, tuple[str, str]] = {}
+        self.access_tokens: dict[str, tuple[str, float]] = {}
+        self.refresh_tokens: dict[str, str] = {}
+        self.categories: dict[str, dict] = {}
+        self.spends: dict[str, dict] = {}
+
+    def add_user(self, username: str, password: str, currency: str = "RUB", categories: tuple[str, ...] = ()):
+        self.users[username] = {"password": password, "currency": currency}
+        for name in categories:
+            self.add_category(username, name)
+
+    def add_category(self, username: str, name: str) -> dict:
+        category = {"id": str(uuid.uuid4()), "category": name, "username": username}
+        self.categories[category["id"]] = category
+        return category
+
+    def user_categories(self, username: str) -> list[dict]:
+        return sorted(
+            (category for category in self.categories.values() if category["username"] == username),
+            key=lambda category: category["category"]
+        )
+
+    def issue_tokens(self, username: str) -> dict:
+        now = int(time.time())
+        header = b64url(json.dumps({"alg": "none", "typ": "JWT"}).encode("utf8"))
+        payload = b64url(json.dumps({"sub": username, "iat": now, "exp": now + TOKEN_TTL_SECONDS}).encode("utf8"))
+        access_token = f"{header}.{payload}.{b64url(secrets.token_bytes(16))}"
+        refresh_token = secrets.token_urlsafe(32)
+        self.access_tokens[access_token] = (username, now + TOKEN_TTL_SECONDS)
+        self.refresh_tokens[refresh_token] = username
+        return {
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "id_token": access_token,
+            "token_type": "Bearer",
+            "scope": "openid",
+            "expires_in": TOKEN_TTL_SECONDS
+        }
+
+    def token_user(self, authorization: str) -> str | None:
+        if not authorization.startswith("Bearer "):
+            return None
+        username, expires_at = self.access_tokens.get(authorization.removeprefix("Bearer "), (None, 0))
+        return username if expires_at > time.time() else None
+
+
+class FakeNiffler:
+    """aiohttp приложение поверх FakeNifflerStore. Семантика - как у gateway и niffler-spend:
+    трата только в валюте пользователя, категория трат должна существовать, не больше 8 категорий."""
+
+    def __init__(self, store: FakeNifflerStore | None = None):
+        self.store = store or FakeNifflerStore()
+        self.app = web.Application(middlewares=[self.gateway_auth])
+        self.app.add_routes([
+            web.get("/oauth2/authorize", self.authorize),
+            web.get("/login", self.login_page),
+            web.post("/login", self.login),
+            web.post("/oauth2/token", self.token),
+            web.get("/register", self.register_page),
+            web.post("/register", self.register),
+            web.get("/authorized", self.authorized),
+            web.get("/api/users/current", self.current_user),
+            web.get("/api/categories/all", self.get_categories),
+            web.post("/api/categories/add", self.add_category),
+            web.get("/api/spends/all", self.get_spends),
+            web.get("/api/v2/spends/all", self.get_spends_page),
+            web.post("/api/spends/add", self.add_spend),
+            web.patch("/api/spends/edit", self.edit_spend),
+            web.delete("/api/spends/remove", self.remove_spends),
+        ])
+
+    # --- Сервис авторизации ---
+
+    def _session(self, request: web.Request) -> tuple[str, dict]:
+        session_id = request.cookies.get(SESSION_COOKIE)
+        if session_id not in self.store.sessions:
+            session_id = secrets.token_hex(16)
+            self.store.sessions[session_id] = {"xsrf": secrets.token_urlsafe(16)}
+        return session_id, self.store.sessions[session_id]
+
+    @staticmethod
+    def _with_session(response: web.StreamResponse, session_id: str, session: dict | None = None) -> web.StreamResponse:
+        """Кука сессии; XSRF-TOKEN - только на страницах с формой, как у Spring Authorization Server:
+        AuthSession копирует куки из redirect'ов, и дубль XSRF-TOKEN сломал бы cookies.get()."""
+        response.set_cookie(SESSION_COOKIE, session_id, path="/", httponly=True)
+        if session is not None:
+            response.set_cookie(XSRF_COOKIE, session["xsrf"], path="/")
+        return response
+
+    async def authorize(self, request: web.Request) -> web.StreamResponse:
+        session_id, session = self._session(request)
+        if "username" not in session:
+            session["pending"] = dict(request.query)
+            return self._with_session(redirect("/login"), session_id)
+        code = secrets.token_urlsafe(24)
+        self.store.codes[code] = (session["username"], request.query.get("code_challenge", ""))
+        location = f"{request.query['redirect_uri']}?{urlencode({'code': code})}"
+        return self._with_session(redirect(location), session_id)
+
+    async def login_page(self, request: web.Request) -> web.StreamResponse:
+        session_id, session = self._session(request)
+        return self._with_session(web.Response(text="<form method='post'>login</form>", content_type="text/html"),
+                                  session_id, session)
+
+    async def login(self, request: web.Request) -> web.StreamResponse:
+        session_id, session = self._session(request)
+        form = await request.post()
+        user = self.store.users.get(form.get("username", ""))
+        if form.get("_csrf") != session["xsrf"]:
+            return error(403, "Invalid CSRF token", request)
+        if user is None or user["password"] != form.get("password"):
+            return self._with_session(redirect("/login?error"), session_id)
+        session["username"] = form["username"]
+        pending = session.pop("pending", None)
+        location = f"/oauth2/authorize?{urlencode(pending)}" if pending else "/"
+        return self._with_session(redirect(location), session_id)
+
+    async def token(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        grant_type = form.get("grant_type")
+        if grant_type == "authorization_code":
+            username, challenge = self.store.codes.pop(form.get("code", ""), (None, None))
+            verifier = form.get("code_verifier", "")
+            if username is None or b64url(hashlib.sha256(verifier.encode("ascii")).digest()) != challenge:
+                return web.json_response({"error": "invalid_grant"}, status=400)
+            return web.json_response(self.store.issue_tokens(username))
+        if grant_type == "refresh_token":
+            username = self.store.refresh_tokens.pop(form.get("refresh_token", ""), None)
+            if username is None:
+                return web.json_response({"error": "invalid_grant"}, status=400)
+            return web.json_response(self.store.issue_tokens(username))
+        return web.json_response({"error": "unsupported_grant_type"}, status=400)
+
+    async def register_page(self, request: web.Request) -> web.StreamResponse:
+        session_id, session = self._session(request)
+        return self._with_session(web.Response(text="<form method='post'>register</form>", content_type="text/html"),
+                                  session_id, session)
+
+    async def register(self, request: web.Request) -> web.StreamResponse:
+        session_id, session = self._session(request)
+        form = await request.post()
+        username = form.get("username", "")
+        if form.get("_csrf") != session["xsrf"]:
+            return error(403, "Invalid CSRF token", request)
+        if form.get("password") != form.get("passwordSubmit"):
+            return web.Response(text="Passwords should be equal", status=400)
+        if username in self.store.users:
+            return web.Response(text=f"Username `{username}` already exists", status=400)
+        self.store.add_user(username, form.get("password", ""))
+        return self._with_session(web.Response(text="Congratulations! You've registered!", status=201), session_id)
+
+    async def authorized(self, request: web.Request) -> web.Response:
+        """redirect_uri фронтенда - сюда приходит code в конце authorization code flow."""
+        return web.Response(text="authorized")
+
+    # --- Gateway ---
+
+    @web.middleware
+    async def gateway_auth(self, request: web.Request, handler) -> web.StreamResponse:
+        if request.path.startswith("/api/"):
+            username = self.store.token_user(request.headers.get("Authorization", ""))
+            if username is None:
+                return web.Response(status=401, headers={"WWW-Authenticate": "Bearer"})
+            request[USERNAME_KEY] = username
+        return await handler(request)
+
+    async def current_user(self, request: web.Request) -> web.Response:
+        username = request[USERNAME_KEY]
+        return web.json_response({
+            "id": str(uuid.uuid5(uuid.NAMESPACE_URL, username)),
+            "username": username,
+            "currency": self.store.users[username]["currency"]
+        })
+
+    async def get_categories(self, request: web.Request) -> web.Response:
+        return web.json_response(self.store.user_categories(request[USERNAME_KEY]))
+
+    async def add_category(self, request: web.Request) -> web.Response:
+        username = request[USERNAME_KEY]
+        name = (await request.json()).get("category") or ""
+        if not 2 <= len(name.strip()) <= 50:
+            return error(400, "Allowed category length should be from 2 to 50 characters", request)
+        categories = self.store.user_categories(username)
+        if len(categories) >= MAX_CATEGORIES:
+            return error(406, f"Can`t add over than 8 categories for user: '{username}'", request)
+        if any(category["category"] == name for category in categories):
+            return error(409, f"Category with name '{name}' already exists", request)
+        return web.json_response(self.store.add_category(username, name))
+
+    def _validate_spend(self, request: web.Request, body: dict) -> web.Response | None:
+        """Валидация SpendJson в gateway (@Valid); None - трата корректна."""
+        if body.get("currency") is not None and body["currency"] not in CURRENCIES:
+            return error(400, f"Unknown currency: {body['currency']}", request)
+        problems = []
+        if not body.get("spendDate"):
+            problems.append("Spend date can not be null")
+        elif parse_date(body["spendDate"]) > datetime.now(timezone.utc):
+            problems.append("Spend date must not be future")
+        if not (body.get("category") or "").strip():
+            problems.append("Category can not be blank")
+        if body.get("amount") is None:
+            problems.append("Amount can not be null")
+        elif body["amount"] < 0.01:
+            problems.append("Amount should be greater than 0.01")
+        if problems:
+            return error(400, ", ".join(problems), request)
+        return None
+
+    def _check_category(self, request: web.Request, body: dict) -> web.Response | None:
+        """niffler-spend не создаёт категорию на лету: трата только в существующую категорию пользователя."""
+        if not any(category["category"] == body["category"]
+                   for category in self.store.user_categories(request[USERNAME_KEY])):
+            return error(404, f"Can`t find category by given name: {body['category']}", request)
+        return None
+
+    @staticmethod
+    def _spend_json(spend: dict) -> dict:
+        return spend | {"spendDate": format_date(spend["spendDate"])}
+
+    async def get_spends(self, request: web.Request) -> web.Response:
+        return web.json_response([self._spend_json(spend) for spend in self._filtered_spends(request)])
+
+    async def get_spends_page(self, request: web.Request) -> web.Response:
+        """Pageable версия: page с нуля, size, ответ - Page из Spring Data."""
+        spends = self._filtered_spends(request)
+        page = int(request.query.get("page", 0))
+        size = int(request.query.get("size", 20))
+        content = [self._spend_json(spend) for spend in spends[page * size:(page + 1) * size]]
+        total_pages = -(-len(spends) // size)
+        return web.json_response({
+            "content": content,
+            "number": page,
+            "size": size,
+            "numberOfElements": len(content),
+            "totalElements": len(spends),
+            "totalPages": total_pages,
+            "first": page == 0,
+            "last": page >= total_pages - 1,
+            "empty": not content
+        })
+
+    def _filtered_spends(self, request: web.Request) -> list[dict]:
+        """Фильтры gateway: filterPeriod (TODAY, WEEK, MONTH) и filterCurrency, сверху - новые, при равной дате - по id."""
+        now = datetime.now(timezone.utc)
+        date_from = {
+            "TODAY": now.replace(hour=0, minute=0, second=0, microsecond=0),
+            "WEEK": now - timedelta(days=7),
+            "MONTH": now - timedelta(days=30),
+        }.get(request.query.get("filterPeriod", ""))
+        currency = request.query.get("filterCurrency")
+        spends = [
+            spend for spend in self.store.spends.values()
+            if spend["username"] == request[USERNAME_KEY]
+            and spend["spendDate"] <= now
+            and (date_from is None or spend["spendDate"] >= date_from)
+            and (currency is None or spend["currency"] == currency)
+        ]
+        # Как sort=spendDate,desc&sort=id,asc у iter_spends: сортировка устойчивая, id остаётся tiebreaker'ом
+        spends.sort(key=lambda spend: spend["id"])
+        return sorted(spends, key=lambda spend: spend["spendDate"], reverse=True)
+
+    async def add_spend(self, request: web.Request) -> web.Response:
+        username = request[USERNAME_KEY]
+        body = await request.json()
+        if problem := self._validate_spend(request, body):
+            return problem
+        if body.get("currency") != self.store.users[username]["currency"]:
+            return error(400, "Spending currency should be same with user currency", request)
+        if problem := self._check_category(request, body):
+            return problem
+        spend = {
+            "id": str(uuid.uuid4()),
+            "spendDate": parse_date(body["spendDate"]),
+            "category": body["category"],
+            "currency": body["currency"],
+            "amount": float(body["amount"]),
+            "description": body.get("description") or "",
+            "username": username
+        }
+        self.store.spends[spend["id"]] = spend
+        return web.json_response(self._spend_json(spend), status=201)
+
+    async def edit_spend(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if not body.get("id"):
+            return error(400, "Id should be present", request)
+        if problem := self._validate_spend(request, body) or self._check_category(request, body):
+            return problem
+        spend = self.store.spends.get(body["id"])
+        if spend is None or spend["username"] != request[USERNAME_KEY]:
+            return error(404, f"Can`t find spend by given id: {body['id']}", request)
+        spend.update(
+            spendDate=parse_date(body["spendDate"]),
+            category=body["category"],
+            amount=float(body["amount"]),
+            description=body.get("description") or ""
+        )
+        return web.json_response(self._spend_json(spend))
+
+    async def remove_spends(self, request: web.Request) -> web.Response:
+        """ids - повторяющимся параметром или через запятую, как @RequestParam List<String> в Spring."""
+        ids = {spend_id for value in request.query.getall("ids", []) for spend_id in value.split(",")}
+        for spend_id in ids:
+            spend = self.store.spends.get(spend_id)
+            if spend and spend["username"] == request[USERNAME_KEY]:
+                del self.store.spends[spend_id]
+        return web.Response(status=200)
+
+
+class FakeNifflerServer:
+    """FakeNiffler в фоновом потоке со своим event loop - для запуска из pytest."""
+
+    def __init__(self, niffler: FakeNiffler | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.niffler = niffler or FakeNiffler()
+        self.host = host
+        self.port = port
+        self.loop = asyncio.new_event_loop()
+        self.runner = web.AppRunner(self.niffler.app)
+        self.started = threading.Event()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> "FakeNifflerServer":
+        threading.Thread(target=self._run, name="fake-niffler", daemon=True).start()
+        self.started.wait()
+        return self
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.runner.setup())
+        site = web.TCPSite(self.runner, self.host, self.port)
+        self.loop.run_until_complete(site.start())
+        self.port = self.runner.addresses[0][1]
+        self.started.set()
+        self.loop.run_forever()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+def start_fake_backend(envs: Envs) -> Envs:
+    """Поднимает FakeNiffler в этом процессе, заводит тестового пользователя с категорией
+    и возвращает копию envs, где фронтенд, gateway и сервис авторизации смотрят на него."""
+    server = FakeNifflerServer().start()
+    server.niffler.store.add_user(envs.test_username, envs.test_password, categories=(WORKER_SEED_CATEGORY,))
+    return envs.model_copy(update={"frontend_url": server.url, "gateway_url": server.url, "auth_url": server.url})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Niffler auth server and gateway")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--user", action="append", default=[], metavar="USERNAME:PASSWORD",
+                        help="Pre-registered user, can be repeated")
+    args = parser.parse_args()
+    niffler = FakeNiffler()
+    for user in args.user:
+        username, password = user.split(":", 1)
+        niffler.store.add_user(username, password)
+    web.run_app(niffler.app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
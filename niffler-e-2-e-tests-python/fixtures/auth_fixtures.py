@@ -2,8 +2,30 @@ import pytest
 
 from clients.oauth_client import OAuthClient
 from models.config import Envs
+from models.oauth import AuthState
+from utils.cassette import CassetteMode, cassette
+from utils.tokens import is_token_expiring
 
 
 @pytest.fixture(scope="session")
 def auth_token(envs: Envs):
-    return  OAuthClient(envs).get_token(envs.test_username, envs.test_password)
\ No newline at end of file
+    """В режиме replay кассеты токен не проверяется - ответы gateway уже записаны, авторизация не нужна."""
+    if cassette.mode == CassetteMode.REPLAY:
+        return "cassette-replay"
+    return  OAuthClient(envs).get_token(envs.test_username, envs.test_password)
+
+
+@pytest.fixture(scope="session")
+def auth_state_cache() -> dict[str, AuthState]:
+    """Снимки авторизованного состояния браузера по username, живут всю сессию."""
+    return {}
+
+
+@pytest.fixture(scope="function")
+def auth_state(envs: Envs, auth_state_cache: dict[str, AuthState]) -> AuthState:
+    """Снимок авторизованного состояния тестового пользователя. Пересоздаётся, когда exp токена близок."""
+    state = auth_state_cache.get(envs.test_username)
+    if state is None or is_token_expiring(state.token):
+        state = OAuthClient(envs).get_auth_state(envs.test_username, envs.test_password)
+        auth_state_cache[envs.test_username] = state
+    return state
@@ -1,8 +1,12 @@
 import pytest
+from pytest import FixtureRequest
 
+from clients.async_spends_client import SpendsBulkClient
 from clients.spends_client import SpendsHttpClient
-from databases.spend_db import SpendDb
+from databases.pool import pool_stats_key
+from databases.spend_db import SpendDb, mark_orphan_purged, orphan_purge_due
 from models.config import Envs
+from utils.cleanup import CleanupRegistry, cleanup_registry_key
 
 
 @pytest.fixture(scope="session")
@@ -11,5 +15,32 @@ def spends_client(envs: Envs, auth_token) -> SpendsHttpClient:
 
 
 @pytest.fixture(scope="session")
-def spend_db(envs: Envs) -> SpendDb:
-    return SpendDb(envs)
\ No newline at end of file
+def spend_db(request: FixtureRequest, envs: Envs) -> SpendDb:
+    spend_db = SpendDb(envs)
+    if envs.db_purge_interval_hours and orphan_purge_due(envs.test_username, envs.db_purge_interval_hours):
+        spend_db.purge_orphaned_spends(envs.test_username)
+        mark_orphan_purged(envs.test_username)
+    yield spend_db
+    request.config.stash.setdefault(pool_stats_key, []).append(spend_db.pool_stats.summary(spend_db.engine))
+    spend_db.engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def spend_db_isolated(spend_db: SpendDb) -> SpendDb:
+    """SpendDb для чисто БД тестов: всё, что тест записал, откатывается в teardown, чистить ничего не нужно."""
+    with spend_db.rollback_isolated() as isolated:
+        yield isolated
+
+
+@pytest.fixture(scope="session")
+def spends_bulk_client(envs: Envs, auth_token) -> SpendsBulkClient:
+    return SpendsBulkClient(envs, auth_token)
+
+
+@pytest.fixture(scope="session")
+def cleanup_registry(request: FixtureRequest, envs: Envs, spends_bulk_client, spend_db) -> CleanupRegistry:
+    """Общий на сессию реестр созданных тестами данных, остаток удаляется в конце сессии."""
+    registry = CleanupRegistry(spends_bulk_client, spend_db, envs.cleanup_flush_every)
+    request.config.stash[cleanup_registry_key] = registry
+    yield registry
+    registry.flush()
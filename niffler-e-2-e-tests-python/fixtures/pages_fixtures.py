@@ -1,18 +1,68 @@
+import json
+
 import pytest
-from playwright.sync_api import sync_playwright, Page
+from playwright.sync_api import sync_playwright, Page, Browser, BrowserContext
 from playwright.sync_api import expect
+from pytest import FixtureRequest
 
+from models.config import Envs
+from models.oauth import AuthState
+from utils.static_cache import StaticAssetCache
 
-@pytest.fixture(scope="function")
-def playwright_context():
+
+RESTORE_SESSION_STORAGE = """(() => {{
+    if (window.location.origin !== {origin} || window.name === "niffler-session-restored") return;
+    for (const [key, value] of Object.entries({items})) sessionStorage.setItem(key, value);
+    window.name = "niffler-session-restored";
+}})();"""
+
+
+def apply_auth_state(context: BrowserContext, state: AuthState):
+    """Восстанавливает sessionStorage фронтенда до запуска его скриптов.
+    Один раз на вкладку: после logout (sessionStorage.clear()) токен обратно не подкладываем."""
+    context.add_init_script(RESTORE_SESSION_STORAGE.format(
+        origin=json.dumps(state.origin),
+        items=json.dumps(state.session_storage)
+    ))
+
+
+@pytest.fixture(scope="session")
+def chromium_browser(envs: Envs) -> Browser:
+    """Один процесс Chromium на воркер на всю сессию."""
     with sync_playwright() as playwright:
-        browser = playwright.chromium.launch(headless=False)
-        context = browser.new_context(viewport={"width": 1920, "height": 1080})
-        yield context
-        context.close()
+        browser = playwright.chromium.launch(headless=envs.headless, args=envs.browser_args)
+        yield browser
         browser.close()
 
 
+@pytest.fixture(scope="session")
+def static_asset_cache(envs: Envs) -> StaticAssetCache | None:
+    """Кэш статики фронтенда на диске, общий для тестов и воркеров. Включается энвом STATIC_CACHE_DIR."""
+    if not envs.static_cache_dir:
+        return None
+    return StaticAssetCache(envs.static_cache_dir, envs.frontend_url)
+
+
+@pytest.fixture(scope="function")
+def playwright_context(chromium_browser: Browser, static_asset_cache: StaticAssetCache | None,
+                       request: FixtureRequest):
+    """Новый изолированный BrowserContext на каждый тест: cookies и storage не переходят между тестами.
+    Для тестов с main_page контекст сразу создаётся авторизованным из кэшированного снимка."""
+    state: AuthState | None = None
+    if "main_page" in request.fixturenames:
+        state = request.getfixturevalue("auth_state")
+    context = chromium_browser.new_context(
+        viewport={"width": 1920, "height": 1080},
+        storage_state=state.storage_state if state else None
+    )
+    if state:
+        apply_auth_state(context, state)
+    if static_asset_cache:
+        static_asset_cache.install(context)
+    yield context
+    context.close()
+
+
 @pytest.fixture(scope="function")
 def page(playwright_context, envs):
     page = playwright_context.new_page()
@@ -22,11 +72,6 @@ def page(playwright_context, envs):
 
 
 @pytest.fixture(scope="function")
-def main_page(auth_token, page: Page, envs):
-    page.evaluate("""token => {
-        sessionStorage.setItem('id_token', token);
-    }""", auth_token)
-
-    page.goto(envs.frontend_url)
-        
-    return page
\ No newline at end of file
+def main_page(page: Page):
+    """Страница уже авторизована: контекст создан из снимка auth_state, page открыт одной навигацией."""
+    return page
@@ -0,0 +1,203 @@
+"""Нагрузка на gateway теми же клиентами, что и в функциональных тестах.
+
+Каждый виртуальный пользователь - свой пользователь Niffler (<TEST_USERNAME>_vu<N>, регистрируется один раз,
+как пользователи воркеров xdist), свой токен от OAuthClient и свой AsyncSpendsHttpClient.
+Пользователи стартуют равномерно за --ramp-up секунд и гоняют случайную смесь операций до конца --duration.
+
+    python -m load.spends_load --users 20 --ramp-up 10 --duration 60 \\
+        --mix add_spends=3,get_spends=5,get_categories=2,remove_spends=1 --report load_report.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import aiohttp
+
+from clients.async_spends_client import AsyncSpendsHttpClient
+from clients.oauth_client import OAuthClient
+from fakes.niffler import start_fake_backend
+from models.config import Envs, load_envs
+from models.spend import SpendAdd
+from utils.latency import LatencyHistogram
+from utils.sessions import configure_transport
+from utils.workers import WORKER_SEED_CATEGORY, provision_worker_user
+
+OPERATIONS = ("add_spends", "get_spends", "get_categories", "remove_spends")
+DEFAULT_MIX = {"add_spends": 3, "get_spends": 5, "get_categories": 2, "remove_spends": 2}
+
+
+def mix_option(value: str) -> dict[str, int]:
+    """Разбор --mix op=вес,op=вес."""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r}, expected one of {', '.join(OPERATIONS)}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+class LoadStats:
+    """Гистограммы латентности и счётчики ошибок по операциям. rps считается по измеряемому окну:
+    от начала цикла операций первого пользователя до конца цикла последнего - без логина и уборки."""
+
+    def __init__(self):
+        self.histograms: dict[str, LatencyHistogram] = {name: LatencyHistogram() for name in OPERATIONS}
+        self.errors: dict[str, int] = {name: 0 for name in OPERATIONS}
+        self.started: float | None = None
+        self.finished: float | None = None
+
+    def loop_started(self):
+        now = time.monotonic()
+        self.started = now if self.started is None else min(self.started, now)
+
+    def loop_finished(self):
+        now = time.monotonic()
+        self.finished = now if self.finished is None else max(self.finished, now)
+
+    def record(self, operation: str, ms: float, ok: bool):
+        self.histograms[operation].record(ms)
+        if not ok:
+            self.errors[operation] += 1
+
+    def report(self) -> dict:
+        elapsed = max((self.finished or 0.0) - (self.started or 0.0), 1e-9)
+        operations = {
+            name: {
+                "requests": histogram.count,
+                "errors": self.errors[name],
+                "rps": round(histogram.count / elapsed, 2),
+                "p50_ms": round(histogram.percentile(50), 1),
+                "p95_ms": round(histogram.percentile(95), 1),
+                "p99_ms": round(histogram.percentile(99), 1),
+                "max_ms": round(histogram.max_ms, 1)
+            }
+            for name, histogram in self.histograms.items() if histogram.count
+        }
+        total = sum(row["requests"] for row in operations.values())
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "requests": total,
+            "errors": sum(row["errors"] for row in operations.values()),
+            "rps": round(total / elapsed, 2),
+            "operations": operations
+        }
+
+    def summary(self) -> list[str]:
+        report = self.report()
+        lines = [f"{report['requests']} requests in {report['elapsed_s']} s, {report['rps']} rps, "
+                 f"{report['errors']} errors"]
+        lines += [
+            f"{name}: {row['requests']} requests, {row['errors']} errors, {row['rps']} rps, "
+            f"p50 {row['p50_ms']} ms, p95 {row['p95_ms']} ms, p99 {row['p99_ms']} ms, max {row['max_ms']} ms"
+            for name, row in report["operations"].items()
+        ]
+        return lines
+
+
+class VirtualUser:
+    """Один пользователь нагрузки: крутит операции по весам mix, удаляет только созданные им траты."""
+
+    def __init__(self, number: int, envs: Envs, mix: dict[str, int], stats: LoadStats, think_time: float):
+        self.number = number
+        self.envs = envs
+        self.operations = list(mix)
+        self.weights = list(mix.values())
+        self.stats = stats
+        self.think_time = think_time
+        self.created: list[str] = []
+        self.random = random.Random(number)
+
+    def _login(self) -> str:
+        self.envs = provision_worker_user(self.envs, f"vu{self.number}")
+        return OAuthClient(self.envs).get_token(self.envs.test_username, self.envs.test_password)
+
+    async def run(self, start_delay: float, deadline: float):
+        await asyncio.sleep(start_delay)
+        # OAuthClient синхронный - логинимся в потоке, чтобы не держать event loop остальных пользователей
+        token = await asyncio.to_thread(self._login)
+        async with AsyncSpendsHttpClient(self.envs, token, concurrency=1) as client:
+            self.stats.loop_started()
+            while time.monotonic() < deadline:
+                operation = self.random.choices(self.operations, self.weights)[0]
+                if operation == "remove_spends" and not self.created:
+                    operation = "add_spends"
+                start = time.perf_counter()
+                try:
+                    await self._call(client, operation)
+                    ok = True
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    ok = False
+                self.stats.record(operation, (time.perf_counter() - start) * 1000, ok)
+                if self.think_time:
+                    await asyncio.sleep(self.think_time)
+            self.stats.loop_finished()
+            if self.created:
+                await client.remove_spends_many(self.created)
+
+    async def _call(self, client: AsyncSpendsHttpClient, operation: str):
+        if operation == "add_spends":
+            spend = await client.add_spends(SpendAdd(
+                amount=round(self.random.uniform(1, 1000), 2),
+                description=f"Load spend vu{self.number}",
+                category=WORKER_SEED_CATEGORY,
+                spendDate=datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+                currency="RUB"
+            ))
+            self.created.append(spend.id)
+        elif operation == "get_spends":
+            await client.get_spends()
+        elif operation == "get_categories":
+            await client.get_categories()
+        elif operation == "remove_spends":
+            await client.remove_spends([self.created.pop()])
+
+
+async def run_load(envs: Envs, users: int, ramp_up: float, duration: float, mix: dict[str, int],
+                   think_time: float = 0.0) -> LoadStats:
+    stats = LoadStats()
+    deadline = time.monotonic() + duration
+    virtual_users = [VirtualUser(number, envs, mix, stats, think_time) for number in range(users)]
+    await asyncio.gather(*(
+        user.run(ramp_up * number / users, deadline) for number, user in enumerate(virtual_users)
+    ))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test of the Niffler gateway with the e2e API clients")
+    parser.add_argument("--users", type=int, default=10, help="Number of virtual users")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="Seconds to start all virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Total run time in seconds, ramp-up included")
+    parser.add_argument("--mix", type=mix_option, default=dict(DEFAULT_MIX),
+                        help="Operation weights, e.g. add_spends=3,get_spends=5")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Pause between operations of one user, s")
+    parser.add_argument("--report", type=Path, default=None, help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    envs = load_envs()
+    configure_transport(
+        envs.http_pool_size,
+        envs.http_keep_alive,
+        envs.http_retries,
+        envs.http_backoff_factor,
+        envs.http_backoff_jitter,
+        envs.http_connect_timeout,
+        envs.http_read_timeout
+    )
+    if envs.fake_backend:
+        # Прогон самого генератора без стенда
+        envs = start_fake_backend(envs)
+    stats = asyncio.run(run_load(envs, args.users, args.ramp_up, args.duration, args.mix, args.think_time))
+    for line in stats.summary():
+        print(line)
+    if args.report:
+        args.report.write_text(json.dumps(stats.report(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,4 +7,5 @@ class Pages:
 
 class TestData:
     category = lambda x: pytest.mark.parametrize("category", [x], indirect=True)
-    spends = lambda x: pytest.mark.parametrize("spends", [x], indirect=True, ids=lambda param: param.description)
\ No newline at end of file
+    spends = lambda x: pytest.mark.parametrize("spends", [x], indirect=True, ids=lambda param: param.description)
+    seeded_spends = lambda x: pytest.mark.parametrize("seeded_spends", [x], indirect=True, ids=lambda param: f"{len(param)} seeded")
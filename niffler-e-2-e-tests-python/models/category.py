@@ -1,7 +1,27 @@
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 from sqlmodel import SQLModel, Field
 
 
 class Category(SQLModel, table=True):
     id: str = Field(default=None, primary_key=True)
     category: str
-    username: str
\ No newline at end of file
+    username: str
+
+
+class CategoryJson(BaseModel):
+    """Категория в ответах gateway - без SQLAlchemy инструментирования таблицы Category."""
+    model_config = ConfigDict(frozen=True)
+
+    id: str
+    category: str
+    username: str
+
+    def to_table(self) -> Category:
+        return Category.model_validate(self.model_dump())
+
+    @classmethod
+    def from_table(cls, category: Category) -> "CategoryJson":
+        return cls.model_validate(category, from_attributes=True)
+
+
+category_list = TypeAdapter(list[CategoryJson])
@@ -1,3 +1,6 @@
+import os
+
+from dotenv import load_dotenv
 from pydantic import BaseModel
 
 
@@ -11,4 +14,79 @@ class Envs(BaseModel):
     test_password: str
     invalid_user: str
     invalid_password: str
-    wrong_password: str
\ No newline at end of file
+    wrong_password: str
+    headless: bool = False
+    browser_args: list[str] = []
+    worker_users: bool = True
+    token_cache_path: str = ".token_cache.json"
+    cleanup_flush_every: int = 0
+    allure_attach: str = "always"
+    allure_attach_max_bytes: int = 64 * 1024
+    allure_sql: str = "failure"
+    allure_sql_buffer: int = 200
+    spend_db_notify: bool = False
+    spend_db_indexes: bool = False
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_recycle: int = 1800
+    db_pool_timeout: int = 10
+    db_pool_pre_ping: bool = True
+    db_pgbouncer: bool = False
+    db_purge_interval_hours: float = 24
+    http_pool_size: int = 10
+    http_keep_alive: bool = True
+    http_retries: int = 3
+    http_backoff_factor: float = 0.3
+    http_backoff_jitter: float = 0.2
+    http_connect_timeout: float = 5
+    http_read_timeout: float = 30
+    static_cache_dir: str = ""
+    fake_backend: bool = False
+    cassette_mode: str = "off"
+    cassette_path: str = "cassettes/api.jsonl"
+
+
+def load_envs() -> Envs:
+    """Envs из переменных окружения и .env - для фикстуры envs и для запусков вне pytest."""
+    load_dotenv()
+    return Envs(
+        frontend_url=os.getenv("FRONTEND_URL"),
+        gateway_url=os.getenv("GATEWAY_URL"),
+        auth_url=os.getenv("AUTH_URL"),
+        auth_secret=os.getenv("AUTH_SECRET"),
+        spend_db_url=os.getenv("SPEND_DB_URL"),
+        test_username=os.getenv("TEST_USERNAME"),
+        test_password=os.getenv("TEST_PASSWORD"),
+        invalid_user=os.getenv("INVALID_USER"),
+        invalid_password=os.getenv("INVALID_PASSWORD"),
+        wrong_password=os.getenv("WRONG_PASSWORD"),
+        headless=os.getenv("HEADLESS", "false"),
+        browser_args=os.getenv("BROWSER_ARGS", "").split(),
+        worker_users=os.getenv("WORKER_USERS", "true"),
+        token_cache_path=os.getenv("TOKEN_CACHE_PATH", ".token_cache.json"),
+        cleanup_flush_every=os.getenv("CLEANUP_FLUSH_EVERY", "0"),
+        allure_attach=os.getenv("ALLURE_ATTACH", "always"),
+        allure_attach_max_bytes=os.getenv("ALLURE_ATTACH_MAX_BYTES", "65536"),
+        allure_sql=os.getenv("ALLURE_SQL", "failure"),
+        allure_sql_buffer=os.getenv("ALLURE_SQL_BUFFER", "200"),
+        spend_db_notify=os.getenv("SPEND_DB_NOTIFY", "false"),
+        spend_db_indexes=os.getenv("SPEND_DB_INDEXES", "false"),
+        db_pool_size=os.getenv("DB_POOL_SIZE", "5"),
+        db_max_overflow=os.getenv("DB_MAX_OVERFLOW", "10"),
+        db_pool_recycle=os.getenv("DB_POOL_RECYCLE", "1800"),
+        db_pool_timeout=os.getenv("DB_POOL_TIMEOUT", "10"),
+        db_pool_pre_ping=os.getenv("DB_POOL_PRE_PING", "true"),
+        db_pgbouncer=os.getenv("DB_PGBOUNCER", "false"),
+        db_purge_interval_hours=os.getenv("DB_PURGE_INTERVAL_HOURS", "24"),
+        http_pool_size=os.getenv("HTTP_POOL_SIZE", "10"),
+        http_keep_alive=os.getenv("HTTP_KEEP_ALIVE", "true"),
+        http_retries=os.getenv("HTTP_RETRIES", "3"),
+        http_backoff_factor=os.getenv("HTTP_BACKOFF_FACTOR", "0.3"),
+        http_backoff_jitter=os.getenv("HTTP_BACKOFF_JITTER", "0.2"),
+        http_connect_timeout=os.getenv("HTTP_CONNECT_TIMEOUT", "5"),
+        http_read_timeout=os.getenv("HTTP_READ_TIMEOUT", "30"),
+        static_cache_dir=os.getenv("STATIC_CACHE_DIR", ""),
+        fake_backend=os.getenv("FAKE_BACKEND", "false"),
+        cassette_mode=os.getenv("CASSETTE_MODE", "off"),
+        cassette_path=os.getenv("CASSETTE_PATH", "cassettes/api.jsonl")
+    )
\ No newline at end of file
@@ -7,4 +7,18 @@ class OAuthRequest(BaseModel):
     scope: str = "openid"
     redirect_uri: str
     code_challenge: str
-    code_challenge_method: str = "S256"
\ No newline at end of file
+    code_challenge_method: str = "S256"
+
+
+class AuthState(BaseModel):
+    """Снимок авторизованного состояния браузера: storage state Playwright + sessionStorage фронтенда."""
+    token: str
+    origin: str
+    storage_state: dict
+    session_storage: dict[str, str]
+
+
+class CachedToken(BaseModel):
+    """Токены пользователя в файловом кэше."""
+    access_token: str
+    refresh_token: str | None = None
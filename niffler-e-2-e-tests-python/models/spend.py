@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 from sqlmodel import SQLModel, Field
 
 
@@ -21,4 +21,37 @@ class SpendAdd(BaseModel):
     description: str
     category: str
     spendDate: str
-    currency: str
\ No newline at end of file
+    currency: str
+
+
+class SpendJson(BaseModel):
+    """Трата в ответах gateway. Обычная pydantic модель без SQLAlchemy инструментирования - на API пути
+    разбирается в разы быстрее таблицы Spend. category - имя категории, как его отдаёт gateway."""
+    model_config = ConfigDict(frozen=True, populate_by_name=True)
+
+    id: str
+    amount: float
+    description: str
+    category: Optional[str] = None
+    spend_date: Optional[datetime] = Field(default=None, alias="spendDate")
+    currency: Optional[str] = None
+    username: Optional[str] = None
+
+    def to_table(self, category_id: str | None = None) -> Spend:
+        """Строка таблицы spend. В ответе gateway нет id категории - его можно передать отдельно."""
+        fields = self.model_dump(exclude={"category", "spend_date"})
+        return Spend.model_validate(fields | {"category_id": category_id, "spendDate": self.spend_date})
+
+    @classmethod
+    def from_table(cls, spend: Spend, category: str | None = None) -> "SpendJson":
+        """Из строки таблицы spend. В ней только id категории - имя можно передать отдельно."""
+        return cls.model_validate(spend, from_attributes=True).model_copy(update={"category": category})
+
+
+class SpendsPage(BaseModel):
+    """Страница /api/v2/spends/all (Page из Spring Data), нужные клиенту поля."""
+    content: list[SpendJson]
+    last: bool
+
+
+spend_list = TypeAdapter(list[SpendJson])
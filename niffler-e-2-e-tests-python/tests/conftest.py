@@ -2,6 +2,8 @@ import pytest
 from _pytest.fixtures import FixtureRequest
 from faker import Faker
 
+from models.spend import SpendAdd
+
 
 @pytest.fixture
 def generate_test_user():
@@ -10,17 +12,23 @@ def generate_test_user():
 
 
 @pytest.fixture(params=[])
-def category(request: FixtureRequest, spends_client, spend_db):
+def category(request: FixtureRequest, spends_client, cleanup_registry):
     category_name = request.param
-    category = spends_client.add_category(category_name)
-    yield category.category
-    spend_db.delete_category(category.id)
+    category = cleanup_registry.pending_category(category_name) or spends_client.add_category(category_name)
+    cleanup_registry.add_category(category)
+    return category.category
 
 
 @pytest.fixture(params=[])
-def spends(request: FixtureRequest, spends_client):
+def spends(request: FixtureRequest, spends_client, cleanup_registry):
     test_spend = spends_client.add_spends(request.param)
-    yield test_spend
-    all_spends = spends_client.get_spends()
-    if test_spend.id in [spend.id for spend in all_spends]:
-        spends_client.remove_spends([test_spend.id])
\ No newline at end of file
+    cleanup_registry.add_spends([test_spend.id])
+    return test_spend
+
+
+@pytest.fixture(params=[])
+def seeded_spends(request: FixtureRequest, spend_db, envs, cleanup_registry) -> list[SpendAdd]:
+    """Траты, записанные напрямую в БД одной транзакцией, без запросов в gateway.
+    Удаляются вместе с остальными данными при сбросе cleanup_registry."""
+    spend_db.seed_spends(envs.test_username, request.param)
+    return request.param
@@ -1,5 +1,5 @@
 from playwright.sync_api import Page, expect
-from allure import step
+from utils.steps import step
 
 
 class LoginPage:
@@ -12,7 +12,7 @@ class LoginPage:
         self.create_new_user_button = page.locator('.form__register')
         self.error_message = page.locator("p.form__error")
 
-    @step('UI: Sign in')
+    @step('UI: Sign in', timeout_ms=10000)
     def sign_in(self, envs):
         expect(self.username_input).to_be_visible()
         self.username_input.fill(envs.test_username)
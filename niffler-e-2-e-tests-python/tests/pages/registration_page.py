@@ -1,5 +1,5 @@
 from playwright.sync_api import Page, expect
-from allure import step
+from utils.steps import step
 
 
 class RegistrationPage:
@@ -14,7 +14,7 @@ class RegistrationPage:
         self.error_message = page.locator('.form__error')
         self.sign_in_button = page.locator('a:text("Sign in!")')
 
-    @step("UI: Sign up")
+    @step("UI: Sign up", timeout_ms=10000)
     def sign_up(self, user: str, password: str, submit_password: str):
         expect(self.username_input).to_be_empty()
         self.username_input.fill(user)
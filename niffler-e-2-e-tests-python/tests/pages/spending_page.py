@@ -1,6 +1,9 @@
-from playwright.sync_api import Page, expect
+from playwright.sync_api import Page, Response, expect
 from typing import Union, Optional
-from allure import step
+from utils.steps import NEGATIVE_CHECK_TIMEOUT_MS, step
+
+SPENDINGS_API = "/api/spends/all"
+CATEGORIES_API = "/api/categories/all"
 
 
 class SpendingPage:
@@ -51,6 +54,28 @@ class SpendingPage:
         # Картинки
         self.gringotts_image = page.locator('img.spendings__img')
 
+    def expect_api_response(self, path: str):
+        """Ожидание ответа GET запроса фронтенда к gateway по пути path."""
+        return self.page.expect_response(
+            lambda response: path in response.url and response.request.method == "GET"
+        )
+
+    def reload_until(self, path: str) -> Response:
+        """Перезапуск SPA без ожидания load: навигация до commit и ожидание только нужного ответа API."""
+        with self.expect_api_response(path) as response_info:
+            self.page.goto(self.page.url, wait_until="commit")
+        return response_info.value
+
+    @step("UI: Refresh spendings", timeout_ms=10000)
+    def refresh_spendings(self) -> Response:
+        """Подтягивает расходы, созданные в обход UI (API, БД), - вместо page.reload()."""
+        return self.reload_until(SPENDINGS_API)
+
+    @step("UI: Refresh categories", timeout_ms=10000)
+    def refresh_categories(self) -> Response:
+        """Подтягивает категории, созданные в обход UI, - для формы добавления расхода."""
+        return self.reload_until(CATEGORIES_API)
+
     @step("UI: Check spending page titles")
     def check_spending_page_titles(self):
         expect(self.add_spending_title).to_contain_text("Add new spending")
@@ -88,8 +113,10 @@ class SpendingPage:
 
     @step("UI: Check that spending does not exist")
     def check_spending_not_exists(self, description: str):
+        """Сначала ждём отрисовки списка (таблица или "No spendings"), потом короткая негативная проверка."""
+        expect(self.spending_table.or_(self.no_spendings_message)).to_be_visible()
         description_locator = self.page.locator(f"text={description}")
-        expect(description_locator).not_to_be_visible()
+        expect(description_locator).not_to_be_visible(timeout=NEGATIVE_CHECK_TIMEOUT_MS)
 
     @step("UI: Filter spendings by period")
     def filter_by_period(self, period: str):
@@ -99,7 +126,8 @@ class SpendingPage:
             "month": self.last_month_filter,
             "all": self.all_time_filter
         }
-        period_map[period.lower()].click()
+        with self.expect_api_response(SPENDINGS_API):
+            period_map[period.lower()].click()
 
     @step("UI: Check statistics visibility")
     def check_statistics_visible(self):
@@ -37,13 +37,10 @@ def test_spending_should_be_add_db(page: Page, category, spend_db, envs, spends_
     page.get_by_role("button", name="Add new spending").click()
 
 
-    result = spend_db.get_user_spends(envs.test_username)
-    assert any(s.description == spend.description for s in result), "Расход не найден в БД"
+    created = spend_db.wait_for_spend(envs.test_username, description=spend.description)
+    assert created, "Расход не найден в БД"
 
-
-    spends = spend_db.get_user_spends(envs.test_username)
-    spend_id = next(s.id for s in spends if s.description == spend.description)
-    spends_client.remove_spends([spend_id])
+    spends_client.remove_spends([created.id])
 
 
 @allure.story('DB: Verify spending is deleted')
@@ -66,12 +63,30 @@ def test_spending_should_be_deleted_db(page: Page, category, spend_db, envs, spe
     page.get_by_label("Description").fill(spend.description)
     page.get_by_role("button", name="Add new spending").click()
 
-    time.sleep(1)
-
-    spends = spend_db.get_user_spends(envs.test_username)
-    spend_id = next(s.id for s in spends if s.description == spend.description)
-    spends_client.remove_spends([spend_id])
-
-
-    result = spend_db.get_user_spends(envs.test_username)
-    assert not any(s.description == spend.description for s in result), "Расход все еще присутствует в БД"
+    created = spend_db.wait_for_spend(envs.test_username, description=spend.description)
+    assert created, "Расход не найден в БД"
+    spends_client.remove_spends([created.id])
+
+    deleted = spend_db.wait_for_spend_absent(envs.test_username, description=spend.description)
+    assert deleted, "Расход все еще присутствует в БД"
+
+
+@allure.story('DB: Verify seeded spends are found by filters')
+def test_seeded_spends_found_by_filters_db(spend_db_isolated, envs):
+    spends = [
+        SpendAdd(
+            amount=100 + i,
+            description=f"Test DB Spend seeded {i}",
+            category=Category.SCHOOL,
+            spendDate="2025-03-18",
+            currency="RUB"
+        )
+        for i in range(3)
+    ]
+
+    ids = spend_db_isolated.seed_spends(envs.test_username, spends)
+
+    found = spend_db_isolated.find_spend_ids(envs.test_username, ids=ids)
+    assert sorted(found) == sorted(ids), "Засеянные траты не найдены в БД"
+    rows = spend_db_isolated.find_spend_rows(envs.test_username, description=spends[1].description)
+    assert [row.amount for row in rows] == [spends[1].amount]
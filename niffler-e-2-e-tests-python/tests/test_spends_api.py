@@ -69,8 +69,8 @@ class TestSpends:
             assert isinstance(spend.amount, float)
             assert isinstance(spend.description, str)
 
-            if spend.category_id:
-                assert isinstance(spend.category_id, str)
+            if spend.category:
+                assert isinstance(spend.category, str)
             assert spend.currency is not None
             assert spend.username is not None
 
@@ -143,9 +143,7 @@ class TestSpends:
         new_spend = spends_client.add_spends(spend_data)
         spend_id = new_spend.id
 
-        all_spends_before = spends_client.get_spends()
-        spend_ids_before = [s.id for s in all_spends_before]
-        assert spend_id in spend_ids_before
+        assert any(s.id == spend_id for s in spends_client.iter_spends())
 
         spends_client.remove_spends([spend_id])
 
@@ -190,21 +188,20 @@ class TestSpends:
             assert "Spending currency should be same with user currency" == error_json["detail"]
 
     @allure.title("Добавление нескольких трат и удаление их одним запросом")
-    def test_add_multiple_spends_and_remove(self, spends_client):
+    def test_add_multiple_spends_and_remove(self, spends_client, spends_bulk_client):
         categories = spends_client.get_categories()
-        created_spend_ids = []
 
-        for i in range(3):
-            spend_data = SpendAdd(
+        new_spends = spends_bulk_client.add_spends([
+            SpendAdd(
                 amount=100.0 + i,
                 description=f"Multiple spend {i}",
                 category=categories[0].category,
                 spendDate=datetime.now().strftime("%Y-%m-%d"),
                 currency="RUB"
             )
-            
-            new_spend = spends_client.add_spends(spend_data)
-            created_spend_ids.append(new_spend.id)
+            for i in range(3)
+        ])
+        created_spend_ids = [new_spend.id for new_spend in new_spends]
 
         all_spends = spends_client.get_spends()
         for spend_id in created_spend_ids:
@@ -214,4 +211,27 @@ class TestSpends:
 
         all_spends_after = spends_client.get_spends()
         for spend_id in created_spend_ids:
-            assert not any(s.id == spend_id for s in all_spends_after) 
\ No newline at end of file
+            assert not any(s.id == spend_id for s in all_spends_after) 
+
+    @allure.title("Постраничное получение трат с фильтрами")
+    def test_iter_spends_pages(self, spends_client, spends_bulk_client):
+        categories = spends_client.get_categories()
+
+        new_spends = spends_bulk_client.add_spends([
+            SpendAdd(
+                amount=10.0 + i,
+                description=f"Paged spend {i}",
+                category=categories[0].category,
+                spendDate=datetime.now().strftime("%Y-%m-%d"),
+                currency="RUB"
+            )
+            for i in range(3)
+        ])
+        created_spend_ids = {new_spend.id for new_spend in new_spends}
+
+        paged_ids = [s.id for s in spends_client.iter_spends(filter_period="TODAY", page_size=2)]
+        assert len(paged_ids) == len(set(paged_ids)), "Страницы пересекаются"
+        assert created_spend_ids <= set(paged_ids)
+        assert set(paged_ids) == {s.id for s in spends_client.get_spends(filter_period="TODAY")}
+
+        spends_client.remove_spends(list(created_spend_ids))
@@ -98,7 +98,7 @@ def test_spending_page_titles(page: Page) -> None:
 )
 def test_create_spending(page: Page, category: str, spends) -> None:
     spending_page = SpendingPage(page)
-    page.reload()
+    spending_page.refresh_spendings()
 
     spending_page.check_spending_exists(
         category=category,
@@ -111,7 +111,7 @@ def test_create_spending(page: Page, category: str, spends) -> None:
 @allure.story('Spending filters')
 @Pages.main_page
 @TestData.category(Category.SCHOOL)
-@TestData.spends(
+@TestData.seeded_spends([
     SpendAdd(
         amount=108.51,
         description="Test filter",
@@ -119,10 +119,11 @@ def test_create_spending(page: Page, category: str, spends) -> None:
         spendDate="2025-03-18T00:01:27.955Z",
         currency="RUB"
     )
-)
-def test_spending_filters(page: Page, category: str, spends) -> None:
+])
+def test_spending_filters(page: Page, category: str, seeded_spends: list[SpendAdd]) -> None:
     spending_page = SpendingPage(page)
-    page.reload()
+    spends = seeded_spends[0]
+    spending_page.refresh_spendings()
 
     spending_page.filter_by_period("all")
     expect(spending_page.spending_table).to_be_visible()
@@ -151,8 +152,8 @@ def test_spending_filters(page: Page, category: str, spends) -> None:
     )
 )
 def test_delete_spending(page: Page, category: str, spends, spends_client: SpendsHttpClient) -> None:
-    page.reload()
     spending_page = SpendingPage(page)
+    spending_page.refresh_spendings()
     spending_page.check_spending_exists(
         category=category,
         amount=spends.amount,
@@ -160,7 +161,7 @@ def test_delete_spending(page: Page, category: str, spends, spends_client: Spend
     )
 
     spends_client.remove_spends([spends.id])
-    page.reload()
+    spending_page.refresh_spendings()
     spending_page.check_spending_not_exists(spends.description)
 
 
@@ -179,7 +180,7 @@ def test_delete_spending(page: Page, category: str, spends, spends_client: Spend
 )
 def test_create_max_values_spending(page: Page, category: str, spends) -> None:
     spending_page = SpendingPage(page)
-    page.reload()
+    spending_page.refresh_spendings()
 
     spending_page.check_spending_exists(
         category=category,
@@ -192,7 +193,7 @@ def test_create_max_values_spending(page: Page, category: str, spends) -> None:
 @allure.story('Statistics')
 @Pages.main_page
 @TestData.category(Category.SCHOOL)
-@TestData.spends(
+@TestData.seeded_spends([
     SpendAdd(
         amount=108.51,
         description="Test statistics",
@@ -200,10 +201,11 @@ def test_create_max_values_spending(page: Page, category: str, spends) -> None:
         spendDate="2025-03-18T00:01:27.955Z",
         currency="RUB"
     )
-)
-def test_statistics(page: Page, category: str, spends) -> None:
+])
+def test_statistics(page: Page, category: str, seeded_spends: list[SpendAdd]) -> None:
     spending_page = SpendingPage(page)
-    page.reload()
+    spends = seeded_spends[0]
+    spending_page.refresh_spendings()
 
     spending_page.check_statistics_visible()
     spending_page.check_spending_exists(
@@ -228,7 +230,7 @@ def test_statistics(page: Page, category: str, spends) -> None:
 )
 def test_spending_form_validation(page: Page, category: str, spends) -> None:
     spending_page = SpendingPage(page)
-    page.reload()
+    spending_page.refresh_categories()
 
     spending_page.check_form_validation()
 
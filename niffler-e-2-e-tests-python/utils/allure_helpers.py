@@ -1,58 +1,242 @@
+import inspect
 import json
 import logging
+import queue
+import threading
+import time
+from collections import deque
+from enum import Enum
 from json import JSONDecodeError
+from typing import Callable
+from uuid import uuid4
 
 import allure
+import allure_commons
 import curlify
+from allure_commons.reporter import AllureReporter
 from allure_commons.types import AttachmentType
+from allure_pytest.listener import AllureListener
 from requests import Response
+from sqlalchemy import Engine, event
+from sqlalchemy.engine import ExceptionContext
+
+from utils.latency import endpoint_latency
+
+
+class AttachLevel(str, Enum):
+    OFF = "off"
+    FAILURE = "failure"
+    ALWAYS = "always"
+
+
+class AttachSettings:
+    """Настройки аттачментов: уровень для HTTP запросов, максимальный размер тела одного аттачмента,
+    уровень для лога SQL."""
+    level: AttachLevel = AttachLevel.ALWAYS
+    max_bytes: int = 64 * 1024
+    sql_level: AttachLevel = AttachLevel.FAILURE
+
+
+attach_settings = AttachSettings()
+# Ответы текущего теста, которые прикрепим в отчёт, только если тест упадёт (уровень failure)
+failed_test_responses: list[Response] = []
+
+
+def configure_attachments(level: str, max_bytes: int, sql_level: str, sql_buffer: int):
+    attach_settings.level = AttachLevel(level)
+    attach_settings.max_bytes = max_bytes
+    attach_settings.sql_level = AttachLevel(sql_level)
+    sql_capture.resize(sql_buffer)
+
+
+class AttachmentWriter:
+    """Фоновый поток, который сериализует и пишет файлы аттачментов.
+    В потоке теста аттачмент только регистрируется в отчёте (без I/O), чтобы он попал в нужный шаг -
+    контекст шагов allure привязан к потоку."""
+
+    def __init__(self):
+        self.queue: queue.Queue = queue.Queue()
+        self.thread: threading.Thread | None = None
+
+    def submit(self, file_name: str, render: Callable[[], bytes]):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="allure-attachment-writer", daemon=True)
+            self.thread.start()
+        self.queue.put((file_name, render))
+
+    def _run(self):
+        while True:
+            file_name, render = self.queue.get()
+            try:
+                allure_commons.plugin_manager.hook.report_attached_data(body=render(), file_name=file_name)
+            except Exception:
+                logging.exception("Failed to write allure attachment %s", file_name)
+            finally:
+                self.queue.task_done()
+
+    def flush(self):
+        """Дожидается записи всех аттачментов - вызывать до завершения сессии."""
+        self.queue.join()
+
+
+attachment_writer = AttachmentWriter()
+
+
+def allure_reporter() -> AllureReporter | None:
+    """Репортер allure, если отчёт включён (--alluredir), иначе None."""
+    for plugin in allure_commons.plugin_manager.get_plugins():
+        if isinstance(plugin, AllureListener):
+            return plugin.allure_logger
+    return None
+
+
+def truncate(body: bytes) -> bytes:
+    if len(body) <= attach_settings.max_bytes:
+        return body
+    dropped = len(body) - attach_settings.max_bytes
+    return body[:attach_settings.max_bytes] + f"\n... [truncated {dropped} bytes]".encode("utf8")
+
+
+def render_response_body(response: Response) -> bytes:
+    """Json форматируем, только если он влезает в лимит - большие ответы прикладываем как есть, обрезанными."""
+    if len(response.content) <= attach_settings.max_bytes:
+        try:
+            return json.dumps(response.json(), indent=4).encode("utf8")
+        except JSONDecodeError:
+            pass
+    return truncate(response.content)
+
+
+def _deferred_attach_supported() -> bool:
+    """Регистрировать аттачмент без записи файла умеет только приватный AllureReporter._attach
+    (публичный allure.attach пишет файл сразу). Его сигнатура между релизами allure-python-commons
+    менялась - если она не та, что мы ждём, пишем аттачменты синхронно через allure.attach."""
+    attach = getattr(AllureReporter, "_attach", None)
+    if attach is None:
+        return False
+    parameters = inspect.signature(attach).parameters
+    return {"uuid", "name", "attachment_type", "extension"} <= parameters.keys()
+
+
+DEFERRED_ATTACH_SUPPORTED = _deferred_attach_supported()
+
+
+def attach_response(response: Response):
+    """Регистрирует в отчёте запрос (curl), тело и хедеры ответа; сериализация и запись - в фоне."""
+    reporter = allure_reporter()
+    if reporter is None:
+        return
+    is_json = "json" in response.headers.get("Content-Type", "")
+    attachments = [
+        (f"Request {response.status_code}", AttachmentType.TEXT, ".txt",
+         lambda: truncate(curlify.to_curl(response.request).encode("utf8"))),
+        (f"Response {'json' if is_json else 'text'} {response.status_code}",
+         AttachmentType.JSON if is_json else AttachmentType.TEXT, ".json" if is_json else ".txt",
+         lambda: render_response_body(response)),
+        (f"Response headers {response.status_code}", AttachmentType.JSON, ".json",
+         lambda: json.dumps(dict(response.headers), indent=4).encode("utf8")),
+    ]
+    for name, attachment_type, extension, render in attachments:
+        if not DEFERRED_ATTACH_SUPPORTED:
+            allure.attach(render(), name=name, attachment_type=attachment_type, extension=extension)
+            continue
+        file_name = reporter._attach(uuid4(), name=name, attachment_type=attachment_type, extension=extension)
+        attachment_writer.submit(file_name, render)
+
+
+def attach_failed_test_responses():
+    """Прикрепляет в отчёт запросы упавшего теста (уровень failure)."""
+    for response in failed_test_responses:
+        attach_response(response)
+    failed_test_responses.clear()
 
 
 def allure_attach_request(function):
-    """Декоратор логироваания запроса, хедеров запроса, хедеров ответа в allure шаг и аллюр аттачмент и в консоль."""
+    """Декоратор логироваания запроса, хедеров запроса, хедеров ответа в allure шаг и аллюр аттачмент и в консоль.
+    Что прикладывать, решает attach_settings.level: ничего, только для упавших тестов или всегда.
+    Длительность запроса (вместе с ретраями и редиректами) пишется в гистограммы endpoint_latency."""
     def wrapper(*args, **kwargs):
         method, url = args[1], args[2]
         with allure.step(f"{method} {url}"):
 
-            response: Response = function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                response: Response = function(*args, **kwargs)
+            except Exception:
+                endpoint_latency.record(method, url, "error", (time.perf_counter() - start) * 1000)
+                raise
+            endpoint_latency.record(method, url, response.status_code, (time.perf_counter() - start) * 1000)
 
-            curl = curlify.to_curl(response.request)
-            logging.debug(curl)
-            logging.debug(response.text)
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug(curlify.to_curl(response.request))
+                logging.debug(response.text)
 
-            allure.attach(
-                body=curl.encode("utf8"),
-                name=f"Request {response.status_code}",
-                attachment_type=AttachmentType.TEXT,
-                extension=".txt"
-            )
-            try:
-                allure.attach(
-                    body=json.dumps(response.json(), indent=4).encode("utf8"),
-                    name=f"Response json {response.status_code}",
-                    attachment_type=AttachmentType.JSON,
-                    extension=".json"
-                )
-            except JSONDecodeError:
-                allure.attach(
-                    body=response.text.encode("utf8"),
-                    name=f"Response text {response.status_code}",
-                    attachment_type=AttachmentType.TEXT,
-                    extension=".txt")
-            allure.attach(
-                body=json.dumps(dict(response.headers), indent=4).encode("utf8"),
-                name=f"Response headers {response.status_code}",
-                attachment_type=AttachmentType.JSON,
-                extension=".json"
-            )
+            if attach_settings.level == AttachLevel.ALWAYS:
+                attach_response(response)
+            elif attach_settings.level == AttachLevel.FAILURE:
+                failed_test_responses.append(response)
         return response
 
     return wrapper
 
 
-def attach_sql(cursor, statement, parameters, context):
-    """Функция для прослушивания события do_execute SQLAlchemy и прикрепления SQL запроса в Allure отчет"""
-    statement_with_params = statement % parameters
-    name = statement.split(" ")[0] + " " + context.engine.url.database
-    allure.attach(statement_with_params, name=name, attachment_type=AttachmentType.TEXT)
-    return False  # Возвращаем False, чтобы SQLAlchemy продолжил выполнение запроса
\ No newline at end of file
+class SqlCapture:
+    """Кольцевой буфер последних SQL запросов с длительностями. Вешается на события cursor_execute движка
+    и прикладывается в отчёт одним аттачментом: для упавших тестов или, на уровне always, для каждого теста."""
+
+    def __init__(self, size: int = 200):
+        self.records: deque[str] = deque(maxlen=size)
+
+    def resize(self, size: int):
+        self.records = deque(self.records, maxlen=size)
+
+    def install(self, engine: Engine):
+        event.listen(engine, "before_cursor_execute", self.before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self.after_cursor_execute)
+        event.listen(engine, "handle_error", self.handle_error)
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+        self._record(conn, cursor, statement, parameters, executemany, elapsed_ms)
+
+    def handle_error(self, exception_context: ExceptionContext):
+        """Упавший запрос: after_cursor_execute для него не вызывается, а в отчёте он нужнее всего."""
+        conn = exception_context.connection
+        starts = conn.info.get("query_start") if conn is not None else None
+        if exception_context.statement is None or not starts:
+            return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+        context = exception_context.execution_context
+        self._record(
+            conn, getattr(context, "cursor", None), exception_context.statement, exception_context.parameters,
+            bool(context and context.executemany), elapsed_ms,
+            error=f"{type(exception_context.original_exception).__name__}: {exception_context.original_exception}"
+        )
+
+    def _record(self, conn, cursor, statement, parameters, executemany: bool, elapsed_ms: float,
+                error: str | None = None):
+        if executemany:
+            sql = f"{statement}  -- executemany x{len(parameters)}"
+        else:
+            # psycopg2 хранит отправленный в БД запрос с уже подставленными параметрами
+            query = getattr(cursor, "query", None)
+            sql = query.decode("utf8") if isinstance(query, bytes) else f"{statement}  -- {parameters!r}"
+        record = f"[{elapsed_ms:8.2f} ms] {conn.engine.url.database}: {sql}"
+        if error:
+            record = f"{record}\n    ERROR {error.strip()}"
+        self.records.append(record)
+
+    def attach(self):
+        if self.records:
+            allure.attach(
+                body="\n".join(self.records),
+                name=f"SQL log ({len(self.records)} statements)",
+                attachment_type=AttachmentType.TEXT
+            )
+        self.records.clear()
+
+
+sql_capture = SqlCapture()
@@ -0,0 +1,144 @@
+import base64
+import hashlib
+import json
+from enum import Enum
+from pathlib import Path
+from urllib.parse import parse_qsl
+
+import requests
+from requests import PreparedRequest, Response
+from requests.structures import CaseInsensitiveDict
+
+# Тело в кассете уже раскодировано, длину и кодировку проставлять заново не нужно
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+class CassetteMode(str, Enum):
+    OFF = "off"
+    RECORD = "record"
+    REPLAY = "replay"
+
+
+class CassetteMiss(LookupError):
+    """В кассете нет ответа на запрос - в режиме replay в сеть не идём."""
+
+
+def normalize_body(body: bytes | str | None) -> str:
+    """Тело запроса без различий в форматировании: json с отсортированными ключами, форма - отсортированная."""
+    if not body:
+        return ""
+    text = body.decode("utf8") if isinstance(body, bytes) else body
+    try:
+        return json.dumps(json.loads(text), sort_keys=True, separators=(",", ":"))
+    except json.JSONDecodeError:
+        return "&".join(f"{name}={value}" for name, value in sorted(parse_qsl(text, keep_blank_values=True)))
+
+
+def request_keys(request: PreparedRequest) -> tuple[str, str]:
+    """Ключи поиска ответа: точный (метод, путь с query, тело) и запасной (метод, путь без query) -
+    по запасному ответы отдаются по порядку записи, когда в теле есть случайные данные (uuid, время)."""
+    path = request.path_url
+    exact = hashlib.sha1(f"{request.method} {path} {normalize_body(request.body)}".encode("utf8")).hexdigest()
+    return exact, f"{request.method} {path.split('?')[0]}"
+
+
+class Cassette:
+    """Кассета HTTP ответов: JSONL, по ответу на строку, и индекс <кассета>.idx с байтовыми смещениями строк
+    по ключам запроса. В replay читается только индекс, строки - seek'ом по мере запросов.
+    Одинаковые запросы получают записанные ответы по очереди, последний повторяется."""
+
+    def __init__(self):
+        self.mode = CassetteMode.OFF
+        self.path = Path("cassettes/api.jsonl")
+        self.index: dict[str, dict[str, list[int]]] = {"exact": {}, "route": {}}
+        self.cursors: dict[str, int] = {}
+        self.file = None
+
+    @property
+    def index_path(self) -> Path:
+        return self.path.with_suffix(".idx")
+
+    def configure(self, mode: str, path: str):
+        self.close()
+        self.mode = CassetteMode(mode)
+        self.path = Path(path)
+        self.index = {"exact": {}, "route": {}}
+        self.cursors = {}
+        if self.mode == CassetteMode.REPLAY:
+            self._load_index()
+
+    def _load_index(self):
+        if self.index_path.exists() and self.index_path.stat().st_mtime >= self.path.stat().st_mtime:
+            self.index = json.loads(self.index_path.read_text())
+            return
+        # Индекса нет или он старше кассеты (кассету правили руками) - собираем заново одним проходом
+        with self.path.open("rb") as file:
+            offset = file.tell()
+            for line in iter(file.readline, b""):
+                entry = json.loads(line)
+                self._index_entry(entry["key"], entry["route"], offset)
+                offset = file.tell()
+
+    def _index_entry(self, key: str, route: str, offset: int):
+        self.index["exact"].setdefault(key, []).append(offset)
+        self.index["route"].setdefault(route, []).append(offset)
+
+    def record(self, response: Response):
+        if self.file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.file = self.path.open("wb")
+        key, route = request_keys(response.request)
+        try:
+            body, encoding = response.content.decode("utf8"), "utf8"
+        except UnicodeDecodeError:
+            body, encoding = base64.b64encode(response.content).decode("ascii"), "base64"
+        entry = {
+            "key": key,
+            "route": route,
+            "method": response.request.method,
+            "url": response.url,
+            "status": response.status_code,
+            "headers": {name: value for name, value in response.headers.items()
+                        if name.lower() not in DROPPED_HEADERS},
+            "encoding": encoding,
+            "body": body
+        }
+        self._index_entry(key, route, self.file.tell())
+        self.file.write(json.dumps(entry, ensure_ascii=False).encode("utf8") + b"\n")
+
+    def replay(self, request: PreparedRequest) -> Response:
+        key, route = request_keys(request)
+        for kind, lookup in (("exact", key), ("route", route)):
+            offsets = self.index[kind].get(lookup)
+            if offsets:
+                cursor = self.cursors.get(f"{kind} {lookup}", 0)
+                self.cursors[f"{kind} {lookup}"] = cursor + 1
+                return self._response(self._read(offsets[min(cursor, len(offsets) - 1)]), request)
+        raise CassetteMiss(f"No recorded response for {request.method} {request.path_url} in {self.path}")
+
+    def _read(self, offset: int) -> dict:
+        with self.path.open("rb") as file:
+            file.seek(offset)
+            return json.loads(file.readline())
+
+    @staticmethod
+    def _response(entry: dict, request: PreparedRequest) -> Response:
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response._content = (base64.b64decode(entry["body"]) if entry["encoding"] == "base64"
+                             else entry["body"].encode("utf8"))
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf8"
+        return response
+
+    def close(self):
+        """Дописывает индекс записанной кассеты - вызывать в конце сессии."""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            self.index_path.write_text(json.dumps(self.index))
+
+
+cassette = Cassette()
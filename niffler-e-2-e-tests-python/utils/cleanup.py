@@ -0,0 +1,50 @@
+import pytest
+from allure import step
+
+from clients.async_spends_client import SpendsBulkClient
+from databases.spend_db import SpendDb
+from models.category import CategoryJson
+
+
+class CleanupRegistry:
+    """Копит id созданных тестами сущностей и удаляет их пачками: каждые flush_every тестов
+    (0 - только в конце сессии). Повторное удаление уже удалённых id безопасно,
+    поэтому в teardown не нужно выкачивать весь список трат пользователя."""
+
+    def __init__(self, bulk_client: SpendsBulkClient, spend_db: SpendDb, flush_every: int = 0):
+        self.bulk_client = bulk_client
+        self.spend_db = spend_db
+        self.flush_every = flush_every
+        self.spend_ids: dict[str, None] = {}
+        self.categories: dict[str, CategoryJson] = {}
+        self.tests_since_flush = 0
+
+    def add_spends(self, ids: list[str]):
+        self.spend_ids.update(dict.fromkeys(ids))
+
+    def add_category(self, category: CategoryJson):
+        self.categories[category.category] = category
+
+    def pending_category(self, name: str) -> CategoryJson | None:
+        """Категория с таким именем, которая ещё не удалена - её можно переиспользовать вместо создания."""
+        return self.categories.get(name)
+
+    def test_finished(self):
+        self.tests_since_flush += 1
+        if self.flush_every and self.tests_since_flush >= self.flush_every:
+            self.flush()
+
+    @step("Cleanup: Remove created test data")
+    def flush(self):
+        """Траты - пачками через remove_spends, засеянные в БД строки и категории - bulk DELETE."""
+        if self.spend_ids:
+            self.bulk_client.remove_spends(list(self.spend_ids))
+        self.spend_db.cleanup_seeded()
+        if self.categories:
+            self.spend_db.delete_categories([category.id for category in self.categories.values()])
+        self.spend_ids.clear()
+        self.categories.clear()
+        self.tests_since_flush = 0
+
+
+cleanup_registry_key = pytest.StashKey[CleanupRegistry]()
@@ -0,0 +1,85 @@
+import json
+import time
+from pathlib import Path
+
+from pytest import FixtureDef
+
+FIXTURE_PROFILE_PATH = Path("fixture_profile.json")
+
+
+class FixtureProfiler:
+    """Время setup/teardown фикстур по имени и scope за весь прогон, плюс суммарное время фаз тестов
+    (setup, call - тело теста, teardown). Складывается между воркерами xdist так же, как endpoint_latency."""
+
+    def __init__(self):
+        # "scope name" -> [вызовов, setup секунд, teardown секунд]
+        self.fixtures: dict[str, list[float]] = {}
+        self.phases: dict[str, float] = {"setup": 0.0, "call": 0.0, "teardown": 0.0}
+        self.teardown_started: dict[FixtureDef, float] = {}
+
+    def _counters(self, fixturedef: FixtureDef) -> list[float]:
+        return self.fixtures.setdefault(f"{fixturedef.scope} {fixturedef.argname}", [0, 0.0, 0.0])
+
+    def record_setup(self, fixturedef: FixtureDef, seconds: float):
+        counters = self._counters(fixturedef)
+        counters[0] += 1
+        counters[1] += seconds
+
+    def start_teardown(self, fixturedef: FixtureDef):
+        self.teardown_started[fixturedef] = time.perf_counter()
+
+    def finish_teardown(self, fixturedef: FixtureDef):
+        started = self.teardown_started.pop(fixturedef, None)
+        if started is not None:
+            self._counters(fixturedef)[2] += time.perf_counter() - started
+
+    def record_phase(self, when: str, seconds: float):
+        self.phases[when] += seconds
+
+    def to_dict(self) -> dict:
+        return {"fixtures": self.fixtures, "phases": self.phases}
+
+    def merge(self, data: dict):
+        for key, (count, setup, teardown) in data.get("fixtures", {}).items():
+            counters = self.fixtures.setdefault(key, [0, 0.0, 0.0])
+            counters[0] += count
+            counters[1] += setup
+            counters[2] += teardown
+        for when, seconds in data.get("phases", {}).items():
+            self.phases[when] += seconds
+
+    def report(self) -> dict:
+        fixtures = [
+            {
+                "fixture": key.split(" ")[1],
+                "scope": key.split(" ")[0],
+                "count": count,
+                "setup_s": round(setup, 3),
+                "teardown_s": round(teardown, 3),
+                "total_s": round(setup + teardown, 3)
+            }
+            for key, (count, setup, teardown) in self.fixtures.items()
+        ]
+        return {
+            "phases": {when: round(seconds, 3) for when, seconds in self.phases.items()},
+            "fixtures": sorted(fixtures, key=lambda row: row["total_s"], reverse=True)
+        }
+
+    def summary(self, top: int = 10) -> list[str]:
+        report = self.report()
+        phases = report["phases"]
+        lines = [
+            f"setup {phases['setup']:.2f} s, test bodies {phases['call']:.2f} s, teardown {phases['teardown']:.2f} s"
+        ]
+        lines += [
+            f"[{row['scope']}] {row['fixture']}: {row['count']}x, setup {row['setup_s']:.2f} s, "
+            f"teardown {row['teardown_s']:.2f} s"
+            for row in report["fixtures"][:top]
+        ]
+        return lines
+
+    def write_report(self, path: Path = FIXTURE_PROFILE_PATH):
+        path.write_text(json.dumps(self.report(), indent=2))
+
+
+fixture_profiler = FixtureProfiler()
@@ -0,0 +1,121 @@
+import json
+import math
+import re
+from pathlib import Path
+from urllib.parse import urlparse
+
+LATENCY_REPORT_PATH = Path("latency_report.json")
+# Границы корзин растут геометрически, как в HDR гистограмме: 16 корзин на удвоение - погрешность ~4.5%
+BUCKETS_PER_DOUBLING = 16
+MIN_LATENCY_MS = 0.1
+
+UUID_SEGMENT = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.IGNORECASE)
+
+
+def path_template(url: str) -> str:
+    """Путь без query, с id (uuid и числа) заменёнными на {id}, чтобы запросы к одному эндпоинту попадали в одну строку."""
+    segments = [
+        "{id}" if UUID_SEGMENT.match(segment) or segment.isdigit() else segment
+        for segment in urlparse(url).path.split("/")
+    ]
+    return "/".join(segments)
+
+
+class LatencyHistogram:
+    """Гистограмма длительностей в миллисекундах с логарифмическими корзинами. Гистограммы складываются
+    поштучно по корзинам, поэтому перцентили после слияния с других воркеров остаются корректными."""
+
+    def __init__(self):
+        self.buckets: dict[int, int] = {}
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    @staticmethod
+    def bucket(ms: float) -> int:
+        return max(0, math.ceil(math.log2(max(ms, MIN_LATENCY_MS) / MIN_LATENCY_MS) * BUCKETS_PER_DOUBLING))
+
+    @staticmethod
+    def bucket_upper_bound(bucket: int) -> float:
+        return MIN_LATENCY_MS * 2 ** (bucket / BUCKETS_PER_DOUBLING)
+
+    def record(self, ms: float):
+        bucket = self.bucket(ms)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, percent: float) -> float:
+        rank = math.ceil(self.count * percent / 100)
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(self.bucket_upper_bound(bucket), self.max_ms)
+        return self.max_ms
+
+    def merge(self, data: dict):
+        for bucket, count in data["buckets"].items():
+            self.buckets[int(bucket)] = self.buckets.get(int(bucket), 0) + count
+        self.count += data["count"]
+        self.total_ms += data["total_ms"]
+        self.max_ms = max(self.max_ms, data["max_ms"])
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total_ms": self.total_ms,
+            "max_ms": self.max_ms,
+            "buckets": {str(bucket): count for bucket, count in self.buckets.items()}
+        }
+
+
+class EndpointLatency:
+    """Гистограммы латентности по эндпоинтам: метод, шаблон пути и статус ответа ("error" - ответа не было)."""
+
+    def __init__(self):
+        self.histograms: dict[tuple[str, str, str], LatencyHistogram] = {}
+
+    def record(self, method: str, url: str, status: int | str, ms: float):
+        key = (method.upper(), path_template(url), str(status))
+        self.histograms.setdefault(key, LatencyHistogram()).record(ms)
+
+    def to_dict(self) -> dict:
+        return {" ".join(key): histogram.to_dict() for key, histogram in self.histograms.items()}
+
+    def merge(self, data: dict):
+        """Вливает to_dict() другого процесса - так контроллер xdist собирает данные воркеров."""
+        for key, histogram in data.items():
+            method, path, status = key.split(" ")
+            self.histograms.setdefault((method, path, status), LatencyHistogram()).merge(histogram)
+
+    def report(self) -> list[dict]:
+        rows = [
+            {
+                "method": method,
+                "path": path,
+                "status": status,
+                "count": histogram.count,
+                "total_ms": round(histogram.total_ms, 1),
+                "p50_ms": round(histogram.percentile(50), 1),
+                "p95_ms": round(histogram.percentile(95), 1),
+                "p99_ms": round(histogram.percentile(99), 1),
+                "max_ms": round(histogram.max_ms, 1)
+            }
+            for (method, path, status), histogram in self.histograms.items()
+        ]
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def summary(self, top: int = 15) -> list[str]:
+        return [
+            f"{row['method']} {row['path']} {row['status']}: {row['count']} requests, total {row['total_ms'] / 1000:.2f} s, "
+            f"p50 {row['p50_ms']} ms, p95 {row['p95_ms']} ms, p99 {row['p99_ms']} ms, max {row['max_ms']} ms"
+            for row in self.report()[:top]
+        ]
+
+    def write_report(self, path: Path = LATENCY_REPORT_PATH):
+        path.write_text(json.dumps(self.report(), indent=2))
+
+
+endpoint_latency = EndpointLatency()
@@ -0,0 +1,58 @@
+import argparse
+import heapq
+import json
+from pathlib import Path
+
+from pytest import Item
+
+DURATIONS_PATH = Path(".test_durations")
+# Для тестов без истории: чтобы новый UI тест не считался мгновенным и не уехал в хвост
+UNKNOWN_DURATION = 1.0
+
+# Длительности текущего прогона по nodeid: setup + call + teardown
+recorded_durations: dict[str, float] = {}
+
+
+def shard_option(value: str) -> tuple[int, int]:
+    """Разбор --shard i/n, i от 1 до n."""
+    try:
+        index, total = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/n, got {value!r}")
+    if not 1 <= index <= total:
+        raise argparse.ArgumentTypeError(f"shard index must be in 1..{total}, got {index}")
+    return index, total
+
+
+def load_durations(path: Path = DURATIONS_PATH) -> dict[str, float]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def store_durations(durations: dict[str, float], path: Path = DURATIONS_PATH):
+    """Дописывает свежие длительности к истории: тесты, которые в этот прогон не запускались, остаются."""
+    merged = load_durations(path) | durations
+    path.write_text(json.dumps(dict(sorted(merged.items())), indent=2))
+
+
+def item_duration(item: Item, durations: dict[str, float]) -> float:
+    return durations.get(item.nodeid, UNKNOWN_DURATION)
+
+
+def longest_first(items: list[Item], durations: dict[str, float]) -> list[Item]:
+    """LPT порядок: воркеры xdist (--dist load) разбирают тесты по очереди, самые долгие уходят первыми,
+    и короткие API тесты добивают хвост."""
+    return sorted(items, key=lambda item: item_duration(item, durations), reverse=True)
+
+
+def lpt_shard(items: list[Item], durations: dict[str, float], index: int, total: int) -> list[Item]:
+    """Раскладывает тесты по total шардам жадным LPT (самый долгий - в наименее загруженный шард)
+    и возвращает тесты шарда index. Все шарды считают одно и то же разбиение по одной истории."""
+    shards = [(0.0, shard) for shard in range(total)]
+    assigned: dict[int, list[Item]] = {shard: [] for shard in range(total)}
+    for item in longest_first(items, durations):
+        load, shard = heapq.heappop(shards)
+        assigned[shard].append(item)
+        heapq.heappush(shards, (load + item_duration(item, durations), shard))
+    return assigned[index - 1]
@@ -2,8 +2,57 @@ from urllib.parse import parse_qs, urlparse
 
 import requests
 from requests import Session
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from utils.allure_helpers import allure_attach_request
+from utils.cassette import CassetteMode, cassette
+
+
+class TransportSettings:
+    """Настройки транспорта сессий: размер пула соединений на хост, keep-alive, ретраи и таймауты по умолчанию.
+    Ретраятся только идемпотентные методы (GET, PUT, DELETE, ...) и ошибки соединения до отправки запроса."""
+    pool_size: int = 10
+    keep_alive: bool = True
+    retries: int = 3
+    backoff_factor: float = 0.3
+    backoff_jitter: float = 0.2
+    retry_statuses: tuple[int, ...] = (502, 503, 504)
+    timeout: tuple[float, float] = (5.0, 30.0)
+
+
+transport_settings = TransportSettings()
+
+
+def configure_transport(pool_size: int, keep_alive: bool, retries: int, backoff_factor: float,
+                        backoff_jitter: float, connect_timeout: float, read_timeout: float):
+    transport_settings.pool_size = pool_size
+    transport_settings.keep_alive = keep_alive
+    transport_settings.retries = retries
+    transport_settings.backoff_factor = backoff_factor
+    transport_settings.backoff_jitter = backoff_jitter
+    transport_settings.timeout = (connect_timeout, read_timeout)
+
+
+def mount_transport(session: Session):
+    """Ставит сессии адаптер с пулом и ретраями из transport_settings."""
+    retry = Retry(
+        total=transport_settings.retries,
+        backoff_factor=transport_settings.backoff_factor,
+        backoff_jitter=transport_settings.backoff_jitter,
+        status_forcelist=transport_settings.retry_statuses,
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=transport_settings.pool_size,
+        pool_maxsize=transport_settings.pool_size,
+        max_retries=retry
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if not transport_settings.keep_alive:
+        session.headers["Connection"] = "close"
 
 
 def raise_for_status(function):
@@ -21,16 +70,35 @@ def raise_for_status(function):
 
 
 class BaseSession(Session):
-    """Сессия с прокидыванием base_url и логированием запроса, ответа, хедеров ответа."""
+    """Сессия с прокидыванием base_url и логированием запроса, ответа, хедеров ответа.
+    Пул соединений, ретраи и таймаут по умолчанию - из transport_settings.
+    В режиме кассеты record ответы пишутся в кассету, в replay - отдаются из неё без сети."""
     def __init__(self, *args, **kwargs):
         super().__init__()
         self.base_url = kwargs.pop("base_url", "")
+        mount_transport(self)
 
     @raise_for_status
     @allure_attach_request
     def request(self, method, url, **kwargs):
         """Логирование запроса и вклейка base_url."""
-        return super().request(method, self.base_url + url, **kwargs)
+        kwargs.setdefault("timeout", transport_settings.timeout)
+        if cassette.mode == CassetteMode.REPLAY:
+            return cassette.replay(self.prepare_request(requests.Request(
+                method=method.upper(),
+                url=self.base_url + url,
+                headers=kwargs.get("headers"),
+                files=kwargs.get("files"),
+                data=kwargs.get("data") or {},
+                json=kwargs.get("json"),
+                params=kwargs.get("params") or {},
+                auth=kwargs.get("auth"),
+                cookies=kwargs.get("cookies")
+            )))
+        response = super().request(method, self.base_url + url, **kwargs)
+        if cassette.mode == CassetteMode.RECORD:
+            cassette.record(response)
+        return response
 
 
 class AuthSession(Session):
@@ -43,12 +111,14 @@ class AuthSession(Session):
         super().__init__()
         self.base_url = kwargs.pop("base_url", "")
         self.code = None
+        mount_transport(self)
 
     @raise_for_status
     @allure_attach_request
     def request(self, method, url, **kwargs):
         """Сохраняем все cookies из redirect'a и сохраняем code авторизации из redirect_uri,
         И используем в дальнейшем в последующих запросах этой сессии."""
+        kwargs.setdefault("timeout", transport_settings.timeout)
         response = super().request(method, self.base_url + url, **kwargs)
         for r in response.history:
             cookies = r.cookies.get_dict()
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from playwright.sync_api import BrowserContext, Route
+
+STATIC_RESOURCE_TYPES = {"script", "stylesheet", "font", "image", "media"}
+# Тело в кэше уже раскодировано, длину и кодировку Playwright посчитает сам
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def write_atomic(path: Path, data: bytes):
+    """Запись через временный файл и rename: параллельные воркеры не увидят недописанный файл."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent)
+    with os.fdopen(fd, "wb") as file:
+        file.write(data)
+    os.replace(tmp, path)
+
+
+class StaticAssetCache:
+    """Дисковый кэш статики фронтенда (бандлы, стили, шрифты, картинки) для context.route.
+    index/<sha(url)>.json хранит ETag, статус, хедеры и адрес тела; тела лежат в objects/<sha(тела)>.
+    Закэшированный ответ один раз за процесс проверяется у фронтенда через If-None-Match,
+    дальше отдаётся с диска без сети. Документ и запросы к gateway идут мимо кэша."""
+
+    def __init__(self, cache_dir: str, frontend_url: str):
+        self.root = Path(cache_dir)
+        self.frontend_url = frontend_url.rstrip("/")
+        self.validated: set[str] = set()
+
+    def install(self, context: BrowserContext):
+        context.route(f"{self.frontend_url}/**", self.handle)
+
+    def _index_path(self, url: str) -> Path:
+        return self.root / "index" / f"{sha256(url.encode('utf8'))}.json"
+
+    def _load(self, url: str) -> tuple[dict, bytes] | None:
+        try:
+            entry = json.loads(self._index_path(url).read_text())
+            return entry, (self.root / "objects" / entry["body"]).read_bytes()
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _store(self, url: str, status: int, headers: dict[str, str], body: bytes) -> dict:
+        digest = sha256(body)
+        objects_path = self.root / "objects" / digest
+        if not objects_path.exists():
+            write_atomic(objects_path, body)
+        entry = {
+            "url": url,
+            "etag": headers.get("etag", ""),
+            "status": status,
+            "headers": {name: value for name, value in headers.items() if name not in DROPPED_HEADERS},
+            "body": digest
+        }
+        write_atomic(self._index_path(url), json.dumps(entry).encode("utf8"))
+        return entry
+
+    def handle(self, route: Route):
+        request = route.request
+        if request.method != "GET" or request.resource_type not in STATIC_RESOURCE_TYPES:
+            route.fallback()
+            return
+        url = request.url
+        cached = self._load(url)
+        if cached and url in self.validated:
+            entry, body = cached
+            route.fulfill(status=entry["status"], headers=entry["headers"], body=body)
+            return
+
+        headers = dict(request.headers)
+        if cached and cached[0]["etag"]:
+            headers["if-none-match"] = cached[0]["etag"]
+        response = route.fetch(headers=headers)
+        if response.status == 304 and cached:
+            entry, body = cached
+        elif response.status == 200:
+            body = response.body()
+            entry = self._store(url, response.status, response.headers, body)
+        else:
+            route.fulfill(response=response)
+            return
+        self.validated.add(url)
+        route.fulfill(status=entry["status"], headers=entry["headers"], body=body)
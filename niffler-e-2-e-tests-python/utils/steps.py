@@ -0,0 +1,70 @@
+import functools
+import time
+
+import allure
+from allure_commons.model2 import Parameter, TestStepResult
+from playwright.sync_api import Page, expect
+
+from utils.allure_helpers import allure_reporter
+
+# Таймаут действия в шаге по умолчанию - столько же, сколько дефолтный таймаут expect в Playwright
+DEFAULT_STEP_TIMEOUT_MS = 5000
+# Таймаут негативных проверок, когда контейнер уже отрисован: элементу неоткуда появиться позже
+NEGATIVE_CHECK_TIMEOUT_MS = 1000
+# Дефолты Playwright: к ним возвращаемся, если действующие таймауты прочитать не удалось
+PLAYWRIGHT_ACTION_TIMEOUT_MS = 30000
+
+# Таймауты открытых (вложенных) шагов - запасной источник для _current_timeouts
+_applied_timeouts: list[int] = []
+
+
+def _current_timeouts(page: Page) -> tuple[float, float | None]:
+    """Таймауты, действующие до шага: действий страницы (с учётом контекста) и expect (None - дефолт).
+    Публичных геттеров у Playwright нет, поэтому читаем из объектов, в которые пишут сеттеры.
+    Если в этой версии Playwright их нет - берём таймаут внешнего шага или дефолты Playwright
+    (значения, выставленные тестом вне шагов, тогда не восстановятся)."""
+    try:
+        return page._impl_obj._timeout_settings.timeout(), expect._timeout
+    except AttributeError:
+        if _applied_timeouts:
+            return _applied_timeouts[-1], _applied_timeouts[-1]
+        return PLAYWRIGHT_ACTION_TIMEOUT_MS, None
+
+
+def _annotate_step(elapsed_ms: float, timeout_ms: int):
+    """Дописывает в текущий allure шаг его длительность и таймаут действий."""
+    reporter = allure_reporter()
+    if reporter is None:
+        return
+    item = reporter.get_last_item(TestStepResult)
+    if item:
+        item.parameters.append(Parameter(name="elapsed, ms", value=f"{elapsed_ms:.0f}"))
+        item.parameters.append(Parameter(name="action timeout, ms", value=str(timeout_ms)))
+
+
+def step(title: str, timeout_ms: int = DEFAULT_STEP_TIMEOUT_MS):
+    """Шаг page object'а: allure шаг, в котором каждое действие и expect ограничены timeout_ms,
+    чтобы зависшее действие падало за timeout_ms, а не за 30 секунд. Это таймаут одного действия,
+    а не дедлайн шага: шаг из N действий может идти до N * timeout_ms. Отдельная проверка может задать свой.
+    На выходе возвращаются таймауты, действовавшие до шага - внешнего шага, теста или страницы.
+    Длительность шага пишется в его параметры в отчёте."""
+    def decorator(function):
+        @allure.step(title)
+        @functools.wraps(function)
+        def wrapper(self, *args, **kwargs):
+            previous_action_ms, previous_expect_ms = _current_timeouts(self.page)
+            _applied_timeouts.append(timeout_ms)
+            self.page.set_default_timeout(timeout_ms)
+            expect.set_options(timeout=timeout_ms)
+            start = time.perf_counter()
+            try:
+                return function(self, *args, **kwargs)
+            finally:
+                _applied_timeouts.pop()
+                self.page.set_default_timeout(previous_action_ms)
+                expect.set_options(timeout=previous_expect_ms)
+                _annotate_step((time.perf_counter() - start) * 1000, timeout_ms)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,34 @@
+import json
+from pathlib import Path
+
+from filelock import FileLock
+
+from models.oauth import CachedToken
+
+
+class TokenCache:
+    """Файловый кэш токенов по (auth_url, username), общий для воркеров xdist и повторных запусков.
+    Читать и писать нужно под lock, чтобы параллельные воркеры не логинились одновременно за одного пользователя."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.lock = FileLock(f"{self.path}.lock")
+
+    @staticmethod
+    def key(auth_url: str, username: str) -> str:
+        return f"{auth_url}|{username}"
+
+    def _load(self) -> dict:
+        try:
+            return json.loads(self.path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def get(self, auth_url: str, username: str) -> CachedToken | None:
+        entry = self._load().get(self.key(auth_url, username))
+        return CachedToken.model_validate(entry) if entry else None
+
+    def put(self, auth_url: str, username: str, token: CachedToken):
+        entries = self._load()
+        entries[self.key(auth_url, username)] = token.model_dump()
+        self.path.write_text(json.dumps(entries, indent=2))
@@ -0,0 +1,31 @@
+import base64
+import json
+import time
+
+
+TOKEN_REFRESH_LEEWAY = 60
+
+
+def jwt_payload(token: str) -> dict:
+    """Декодирует payload JWT без проверки подписи - нам нужны только claims (exp, sub)."""
+    payload = token.split(".")[1]
+    payload += "=" * (-len(payload) % 4)
+    return json.loads(base64.urlsafe_b64decode(payload))
+
+
+def token_expires_at(token: str) -> float | None:
+    """Время истечения токена по claim'у exp, None - если claim'а нет или токен не JWT."""
+    try:
+        return jwt_payload(token).get("exp")
+    except (IndexError, ValueError):
+        return None
+
+
+def is_token_expiring(token: str | None, leeway: int = TOKEN_REFRESH_LEEWAY) -> bool:
+    """True, если токена нет или до exp осталось меньше leeway секунд."""
+    if not token:
+        return True
+    expires_at = token_expires_at(token)
+    if expires_at is None:
+        return False
+    return expires_at - time.time() < leeway
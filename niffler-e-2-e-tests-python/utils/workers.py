@@ -0,0 +1,44 @@
+import os
+import time
+
+from clients.oauth_client import OAuthClient
+from clients.registration_client import RegistrationClient
+from clients.spends_client import SpendsHttpClient
+from models.config import Envs
+from utils.sessions import BaseSession
+
+
+WORKER_SEED_CATEGORY = "common"
+# Сколько ждём, пока userdata получит нового пользователя из Kafka
+USER_READY_TIMEOUT = 30.0
+
+
+def worker_id() -> str:
+    """Id воркера pytest-xdist (gw0, gw1, ...) или master, если тесты идут в одном процессе."""
+    return os.getenv("PYTEST_XDIST_WORKER", "master")
+
+
+def provision_worker_user(envs: Envs, worker: str) -> Envs:
+    """Возвращает копию envs с собственным пользователем воркера, чтобы воркеры не делили данные.
+    Имя детерминировано, поэтому пользователь регистрируется один раз и переиспользуется между запусками.
+    Новому пользователю сразу создаётся категория - тестам API нужна хотя бы одна."""
+    username = f"{envs.test_username}_{worker}"
+    if RegistrationClient(envs).register(username, envs.test_password):
+        token = OAuthClient(envs).get_token(username, envs.test_password)
+        wait_user_ready(envs, token)
+        SpendsHttpClient(envs, token).add_category(WORKER_SEED_CATEGORY)
+    return envs.model_copy(update={"test_username": username})
+
+
+def wait_user_ready(envs: Envs, token: str, timeout: float = USER_READY_TIMEOUT):
+    """Ждёт, пока /api/users/current ответит 200. Регистрация доходит до userdata через Kafka, а gateway
+    на добавлении трат и фронтенд спрашивают userdata - до этого момента они падают на новом пользователе."""
+    session = BaseSession(base_url=envs.gateway_url)
+    session.headers["Authorization"] = f"Bearer {token}"
+    deadline = time.monotonic() + timeout
+    delay = 0.1
+    while session.get("/api/users/current").status_code != 200:
+        if time.monotonic() + delay > deadline:
+            raise TimeoutError(f"userdata did not get the new user in {timeout:.0f} s")
+        time.sleep(delay)
+        delay = min(delay * 2, 1.0)